@@ -1,8 +1,35 @@
+import argparse
+import os
 
+import numpy as np
 import pandas as pd
 from faker import Faker
 import random
 
+CITY_STATE_MAP = {
+    'Bangalore': 'Karnataka', 'Pune': 'Maharashtra', 'Hyderabad': 'Telangana',
+    'Delhi': 'Delhi', 'Mumbai': 'Maharashtra', 'Chennai': 'Tamil Nadu',
+    'Noida': 'Uttar Pradesh', 'Gurgaon': 'Haryana'
+}
+LOCATIONS = list(CITY_STATE_MAP.keys()) + ['Remote']
+DURATIONS = ["2 Months", "3 Months", "6 Months"]
+
+BRANCHES = ['Computer Science', 'IT', 'Electronics', 'Mechanical', 'Civil', 'Electrical', 'Chemical',
+            'Biotechnology', 'Aerospace']
+SKILLS_POOL = [
+    'Python', 'Machine Learning', 'Data Analysis', 'SQL', 'Scikit-learn', 'Web Development', 'React', 'Node.js',
+    'JavaScript', 'MongoDB', 'C++', 'Microcontrollers', 'Embedded Systems', 'IoT', 'Java',
+    'Cloud Computing', 'AWS', 'Azure', 'DevOps', 'CAD', 'SolidWorks', 'MATLAB', 'Ansys', 'AutoCAD'
+]
+COMPANIES = [
+    'Google', 'Microsoft', 'Amazon', 'Tata Motors', 'Intel', 'Larsen & Toubro', 'NVIDIA', 'Flipkart',
+    'Reliance Jio', 'Zomato', 'Siemens', 'Salesforce'
+]
+DOMAINS = [
+    'AI Research', 'Software Development', 'Cloud Engineering', 'Mechanical Design', 'Chip Design',
+    'Civil Engineering', 'Deep Learning', 'Data Science', 'Network Engineering', 'Backend Development'
+]
+
 
 def create_demo_data(num_students=101, num_internships=41):
     """
@@ -10,38 +37,13 @@ def create_demo_data(num_students=101, num_internships=41):
     """
     fake = Faker('en_IN')
 
-    
-    CITY_STATE_MAP = {
-        'Bangalore': 'Karnataka', 'Pune': 'Maharashtra', 'Hyderabad': 'Telangana',
-        'Delhi': 'Delhi', 'Mumbai': 'Maharashtra', 'Chennai': 'Tamil Nadu',
-        'Noida': 'Uttar Pradesh', 'Gurgaon': 'Haryana'
-    }
-    locations = list(CITY_STATE_MAP.keys()) + ['Remote']
-    durations = ["2 Months", "3 Months", "6 Months"]
-
-    branches = ['Computer Science', 'IT', 'Electronics', 'Mechanical', 'Civil', 'Electrical', 'Chemical',
-                'Biotechnology', 'Aerospace']
-    skills_pool = [
-        'Python', 'Machine Learning', 'Data Analysis', 'SQL', 'Scikit-learn', 'Web Development', 'React', 'Node.js',
-        'JavaScript', 'MongoDB', 'C++', 'Microcontrollers', 'Embedded Systems', 'IoT', 'Java',
-        'Cloud Computing', 'AWS', 'Azure', 'DevOps', 'CAD', 'SolidWorks', 'MATLAB', 'Ansys', 'AutoCAD'
-    ]
-    companies = [
-        'Google', 'Microsoft', 'Amazon', 'Tata Motors', 'Intel', 'Larsen & Toubro', 'NVIDIA', 'Flipkart',
-        'Reliance Jio', 'Zomato', 'Siemens', 'Salesforce'
-    ]
-    domains = [
-        'AI Research', 'Software Development', 'Cloud Engineering', 'Mechanical Design', 'Chip Design',
-        'Civil Engineering', 'Deep Learning', 'Data Science', 'Network Engineering', 'Backend Development'
-    ]
-
    
     student_data = []
     for i in range(101, 101 + num_students):
         student_data.append({
-            'student_id': i, 'name': fake.name(), 'branch': random.choice(branches),
-            'cgpa': round(random.uniform(7.0, 10.0), 2), 'location_preference': random.choice(locations),
-            'skills': ', '.join(random.sample(skills_pool, k=random.randint(4, 7)))
+            'student_id': i, 'name': fake.name(), 'branch': random.choice(BRANCHES),
+            'cgpa': round(random.uniform(7.0, 10.0), 2), 'location_preference': random.choice(LOCATIONS),
+            'skills': ', '.join(random.sample(SKILLS_POOL, k=random.randint(4, 7)))
         })
     students_df = pd.DataFrame(student_data)
     students_df.to_csv('students.csv', index=False)
@@ -50,20 +52,136 @@ def create_demo_data(num_students=101, num_internships=41):
     
     internship_data = []
     for i in range(5001, 5001 + num_internships):
-        location = random.choice(locations)
+        location = random.choice(LOCATIONS)
         state = CITY_STATE_MAP.get(location, 'N/A')
         internship_data.append({
-            'internship_id': i, 'company': random.choice(companies), 'domain': random.choice(domains),
+            'internship_id': i, 'company': random.choice(COMPANIES), 'domain': random.choice(DOMAINS),
             'location': location, 'state': state,
             'stipend': random.randint(15, 80) * 1000,
-            'duration': random.choice(durations),
-            'required_skills': ', '.join(random.sample(skills_pool, k=random.randint(3, 5)))
+            'duration': random.choice(DURATIONS),
+            'required_skills': ', '.join(random.sample(SKILLS_POOL, k=random.randint(3, 5)))
         })
     internships_df = pd.DataFrame(internship_data)
     internships_df.to_csv('internships.csv', index=False)
     print(f"✅ Successfully created internships.csv with {len(internships_df)} entries.")
 
 
+def zipf_weights(n, exponent=1.1):
+    """Probabilities proportional to 1 / rank**exponent: a few very common values and a long tail."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _sample_skill_lists(rng, n_rows, pool, weights, k_min, k_max):
+    """
+    Draws k_min..k_max distinct skills per row, weighted by popularity, and joins
+    them into "A, B, C" strings. Sampling without replacement uses the Gumbel-top-k
+    trick so the whole chunk is one argsort instead of a Python loop per row.
+    """
+    keys = np.log(weights)[None, :] - np.log(-np.log(rng.random((n_rows, len(pool)))))
+    top = np.argsort(-keys, axis=1)[:, :k_max]
+    counts = rng.integers(k_min, k_max + 1, size=n_rows)
+    names = np.asarray(pool, dtype=object)
+    joined = names[top[:, 0]]
+    for j in range(1, k_max):
+        joined = np.where(j < counts, joined + ", " + names[top[:, j]], joined)
+    return joined
+
+
+def _students_chunk(rng, start_id, n_rows, first_names, last_names, skill_weights, location_weights):
+    return pd.DataFrame({
+        'student_id': np.arange(start_id, start_id + n_rows),
+        'name': np.asarray(first_names, dtype=object)[rng.integers(0, len(first_names), n_rows)]
+                + " " + np.asarray(last_names, dtype=object)[rng.integers(0, len(last_names), n_rows)],
+        'branch': np.asarray(BRANCHES)[rng.choice(len(BRANCHES), n_rows, p=zipf_weights(len(BRANCHES), 0.8))],
+        'cgpa': np.round(np.clip(rng.normal(8.0, 0.8, n_rows), 5.0, 10.0), 2),
+        'location_preference': np.asarray(LOCATIONS)[rng.choice(len(LOCATIONS), n_rows, p=location_weights)],
+        'skills': _sample_skill_lists(rng, n_rows, SKILLS_POOL, skill_weights, 4, 7),
+    })
+
+
+def _internships_chunk(rng, start_id, n_rows, skill_weights, location_weights):
+    locations = np.asarray(LOCATIONS)[rng.choice(len(LOCATIONS), n_rows, p=location_weights)]
+    # Stipends are right-skewed: most near the median, a few much higher.
+    stipends = np.clip(np.round(rng.lognormal(np.log(30000), 0.5, n_rows), -3), 5000, 150000).astype(int)
+    return pd.DataFrame({
+        'internship_id': np.arange(start_id, start_id + n_rows),
+        'company': np.asarray(COMPANIES)[rng.choice(len(COMPANIES), n_rows, p=zipf_weights(len(COMPANIES), 0.9))],
+        'domain': np.asarray(DOMAINS)[rng.choice(len(DOMAINS), n_rows, p=zipf_weights(len(DOMAINS), 0.8))],
+        'location': locations,
+        'state': pd.Series(locations).map(CITY_STATE_MAP).fillna('N/A').to_numpy(),
+        'stipend': stipends,
+        'duration': np.asarray(DURATIONS)[rng.integers(0, len(DURATIONS), n_rows)],
+        'required_skills': _sample_skill_lists(rng, n_rows, SKILLS_POOL, skill_weights, 3, 5),
+    })
+
+
+def _write_chunks(chunks, output_dir, table, output_format):
+    """Writes DataFrame chunks one at a time, so only one chunk is ever held in memory."""
+    rows = 0
+    if output_format == "csv":
+        path = os.path.join(output_dir, f"{table}.csv")
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            rows += len(chunk)
+    else:
+        # Same part-file layout as storage.ParquetStorage, so the output can be served directly.
+        table_dir = os.path.join(output_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        for i, chunk in enumerate(chunks):
+            chunk.to_parquet(os.path.join(table_dir, f"part-{i:05d}.parquet"), index=False)
+            rows += len(chunk)
+    return rows
+
+
+def generate_load_test_data(num_students=1_000_000, num_internships=100_000, seed=42,
+                            chunk_size=100_000, output_format="csv", output_dir="."):
+    """
+    Vectorized NumPy generator for load testing at realistic scale. Skills, cities,
+    companies and domains follow Zipf-like popularity instead of uniform choice,
+    names are combined from a small Faker-generated pool, and rows are generated
+    and written `chunk_size` at a time. The same seed and chunk size always give
+    the same data.
+    """
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown output format: {output_format}")
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    Faker.seed(seed)
+    fake = Faker('en_IN')
+    first_names = sorted({fake.first_name() for _ in range(2000)})
+    last_names = sorted({fake.last_name() for _ in range(2000)})
+    skill_weights = zipf_weights(len(SKILLS_POOL))
+    location_weights = zipf_weights(len(LOCATIONS), 0.7)
+
+    def student_chunks():
+        for start in range(0, num_students, chunk_size):
+            n_rows = min(chunk_size, num_students - start)
+            yield _students_chunk(rng, 101 + start, n_rows, first_names, last_names, skill_weights, location_weights)
+
+    def internship_chunks():
+        for start in range(0, num_internships, chunk_size):
+            n_rows = min(chunk_size, num_internships - start)
+            yield _internships_chunk(rng, 5001 + start, n_rows, skill_weights, location_weights)
+
+    rows = _write_chunks(student_chunks(), output_dir, "students", output_format)
+    print(f"✅ Successfully created {rows} students ({output_format}) in {output_dir}.")
+    rows = _write_chunks(internship_chunks(), output_dir, "internships", output_format)
+    print(f"✅ Successfully created {rows} internships ({output_format}) in {output_dir}.")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate students and internships data.")
+    parser.add_argument("--students", type=int, help="Number of students; enables the vectorized load-test generator.")
+    parser.add_argument("--internships", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
 
-    create_demo_data(num_students=101, num_internships=41)
+    if args.students is None:
+        create_demo_data(num_students=101, num_internships=41)
+    else:
+        generate_load_test_data(args.students, args.internships, args.seed, args.chunk_size,
+                                args.format, args.output_dir)
@@ -1,32 +1,45 @@
 import pandas as pd
 import logging
 import json
-from sklearn.metrics.pairwise import cosine_similarity
+
+from metrics import stage_timer
 
 
 class AnalyticsEngine:
     def __init__(self, engine):
         """
         Initializes the analytics engine using data from the main RecommendationEngine.
+        Data is read through the engine on every call, so students added or vectors
+        refitted later are always seen, and scoring follows the engine's mode. Each
+        report pins one engine snapshot, so a concurrent write never mixes versions.
         """
-        self.students_df = engine.students_df
-        self.internships_df = engine.internships_df
-        self.student_vectors = engine.student_vectors
-        self.internship_vectors = engine.internship_vectors
+        self.engine = engine
         logging.info("Analytics Engine initialized successfully.")
 
+    @property
+    def students_df(self):
+        return self.engine.students_df
+
+    @property
+    def internships_df(self):
+        return self.engine.internships_df
+
     def find_top_candidates_for_internship(self, internship_index, top_n=5):
         """Finds the top N most suitable student candidates for a given internship."""
-        internship_vector = self.internship_vectors[internship_index]
-        similarity_scores = cosine_similarity(internship_vector, self.student_vectors)
-        sorted_indices = similarity_scores[0].argsort()[::-1]
-        top_indices = sorted_indices[:top_n]
-        top_candidates = self.students_df.iloc[top_indices].copy()
-        top_candidates['match_score'] = similarity_scores[0][top_indices]
+        with self.engine.pinned():
+            similarity_scores = self.engine.score_students(internship_index)
+            sorted_indices = similarity_scores.argsort()[::-1]
+            top_indices = sorted_indices[:top_n]
+            top_candidates = self.students_df.iloc[top_indices].copy()
+        top_candidates['match_score'] = similarity_scores[top_indices]
         return top_candidates
 
     def get_skill_demand_supply_gap(self):
         """Analyzes the dataset to find the gap between skill demand and supply."""
+        with self.engine.pinned(), stage_timer("demand_supply_gap"):
+            return self._skill_demand_supply_gap()
+
+    def _skill_demand_supply_gap(self):
         internship_skills = self.internships_df['normalized_skills'].str.split().explode()
         skill_demand = internship_skills.value_counts().reset_index()
         skill_demand.columns = ['skill', 'demand_count']
@@ -42,6 +55,10 @@ class AnalyticsEngine:
 
     def get_talent_heatmap_data(self):
         """Analyzes the student dataset to create a talent heatmap."""
+        with self.engine.pinned(), stage_timer("talent_heatmap"):
+            return self._talent_heatmap_data()
+
+    def _talent_heatmap_data(self):
         key_skills = ['machine_learning', 'python', 'react', 'web_development', 'cloud_computing', 'aws']
         heatmap_data = self.students_df[['location_preference', 'normalized_skills']].copy()
         for skill in key_skills:
@@ -0,0 +1,82 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+
+
+class IVFIndex:
+    """
+    Inverted-file (cluster-pruned) index over L2-normalized row vectors. Rows are
+    grouped around k-means centroids; a query is compared with the centroids only
+    and exact scoring is limited to the rows of its `n_probe` closest clusters.
+    Raising n_probe trades latency for recall (n_probe == n_lists is exact).
+    """
+
+    def __init__(self, vectors, n_lists=None, n_probe=8, random_state=0, chunk_size=65536):
+        n_rows = vectors.shape[0]
+        self.chunk_size = chunk_size
+        self.n_lists = max(1, min(n_rows, n_lists or int(np.sqrt(n_rows))))
+        self.n_probe = n_probe
+        # k-means needs writable buffers; memory-mapped (read-only) rows are copied for the fit only.
+        data = vectors.data if sp.issparse(vectors) else np.asarray(vectors)
+        writable = data.flags.writeable
+        kmeans = MiniBatchKMeans(
+            n_clusters=self.n_lists, random_state=random_state, batch_size=4096, n_init=3
+        ).fit(vectors if writable else vectors.copy())
+        self.centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+        self.assign(vectors)
+
+    def assign(self, vectors):
+        """
+        (Re)builds the inverted lists for `vectors` against the existing centroids,
+        e.g. after rows were added or removed, without re-running k-means.
+        """
+        n_rows = vectors.shape[0]
+        self.n_rows = n_rows
+        assignments = np.empty(n_rows, dtype=np.int32)
+        for start in range(0, n_rows, self.chunk_size):
+            block = vectors[start : start + self.chunk_size] @ self.centroids.T
+            assignments[start : start + self.chunk_size] = np.asarray(block).argmax(axis=1)
+        # Rows of list c are order[offsets[c]:offsets[c + 1]], in row order.
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=self.n_lists))])
+
+    def list_sizes(self):
+        return np.diff(self.offsets)
+
+    def candidates(self, query_vector, min_results=1, allowed=None, n_probe=None):
+        """
+        Sorted row positions to score exactly for one query: the rows of the
+        n_probe best clusters, restricted to `allowed` (sorted positions, or None
+        for all). More clusters are probed while fewer than `min_results` rows
+        survive the restriction.
+        """
+        n_probe = self.n_probe if n_probe is None else n_probe
+        scores = np.asarray(query_vector @ self.centroids.T).ravel()
+        ranked = np.argsort(-scores, kind="stable")
+        mask = None
+        if allowed is not None:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[allowed] = True
+        picked, found = [], 0
+        for probed, cluster in enumerate(ranked):
+            if probed >= n_probe and found >= min_results:
+                break
+            rows = self.order[self.offsets[cluster] : self.offsets[cluster + 1]]
+            if mask is not None:
+                rows = rows[mask[rows]]
+            picked.append(rows)
+            found += len(rows)
+        if not picked:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(picked))
+
+    def recall(self, query_vectors, vectors, top_n=10, n_probe=None):
+        """Mean share of each query's exact top_n rows that the probed clusters contain."""
+        hits = 0
+        for row in range(query_vectors.shape[0]):
+            exact = (query_vectors[row] @ vectors.T).toarray().ravel()
+            true_top = np.argsort(-exact, kind="stable")[:top_n]
+            found = self.candidates(query_vectors[row], min_results=top_n, n_probe=n_probe)
+            hits += np.isin(true_top, found).sum()
+        return hits / (query_vectors.shape[0] * top_n) if query_vectors.shape[0] else 1.0
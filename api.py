@@ -1,16 +1,30 @@
 # api.py (Fully Featured Flask Version)
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 import toml
 import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import time
+import tempfile
+import zipfile
 
 # Import both of your engine classes
 from engine import RecommendationEngine
 from admin_engine import AnalyticsEngine
+from jobs import JobQueue
+from metrics import REGISTRY, stage_timer
+from reloader import InternshipReloader
+from serialization import (INTERNSHIP_FIELDS, STUDENT_FIELDS, NumpyJSONProvider, parse_fields, project,
+                           record_strings, records_json)
+from storage import open_storage
 
 # --- 1. Initialize the Flask App and the AI Engines ---
 print("Initializing Flask app and loading AI engines...")
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 
 # Load the API key from secrets file
 try:
@@ -20,15 +34,101 @@ except Exception:
     API_KEY = None
     print("⚠️  Warning: .streamlit/secrets.toml not found. Resume suggestions will not work.")
 
-# Load both engines once when the server starts
-try:
-    engine = RecommendationEngine(student_filepath='students.csv', internship_filepath='internships.csv')
-    analytics_engine = AnalyticsEngine(engine)  # Initialize AnalyticsEngine with the main engine
-    print("✅ Both engines loaded successfully.")
-except Exception as e:
-    print(f"❌ ERROR: Could not load engines. {e}")
-    engine = None
-    analytics_engine = None
+# Background workers for slow requests; finished results are kept for this long
+JOB_RESULT_TTL_SECONDS = 600
+job_queue = JobQueue(max_workers=4, result_ttl=JOB_RESULT_TTL_SECONDS)
+
+# Load both engines once when the server starts. Resume parsing workers (resume_ingest)
+# run in fresh interpreters that re-import this script as __mp_main__; they only need
+# the parser, so they skip the engines and the reloader.
+engine = None
+analytics_engine = None
+if __name__ != '__mp_main__':
+    try:
+        # ENGINE_STORAGE selects the data backend, e.g. "sqlite:///internships.db"; CSV files by default
+        storage = open_storage(os.environ.get("ENGINE_STORAGE"), 'students.csv', 'internships.csv')
+        # ENGINE_RETRIEVAL=ivf serves recommendations from an approximate nearest-neighbour index
+        # ENGINE_DENSE_DIMS=128 scores in a truncated-SVD dense space instead of sparse TF-IDF
+        # ENGINE_VECTORIZER=hashing uses online hashed TF-IDF, so new skills never need a refit
+        # ENGINE_SHARED_STATE=shared_state lets every worker process map one published copy of the engine
+        engine = RecommendationEngine(storage=storage, retrieval=os.environ.get("ENGINE_RETRIEVAL", "exact"),
+                                      dense_dims=int(os.environ.get("ENGINE_DENSE_DIMS", 0)) or None,
+                                      vectorizer_mode=os.environ.get("ENGINE_VECTORIZER", "tfidf"),
+                                      shared_state=os.environ.get("ENGINE_SHARED_STATE") or None)
+        analytics_engine = AnalyticsEngine(engine)  # Initialize AnalyticsEngine with the main engine
+        print("✅ Both engines loaded successfully.")
+    except Exception as e:
+        print(f"❌ ERROR: Could not load engines. {e}")
+        engine = None
+        analytics_engine = None
+
+# Internship storage is polled for outside edits every ENGINE_RELOAD_INTERVAL seconds (0 turns it off)
+RELOAD_INTERVAL_SECONDS = float(os.environ.get("ENGINE_RELOAD_INTERVAL", 5))
+reloader = None
+if engine is not None and RELOAD_INTERVAL_SECONDS > 0:
+    reloader = InternshipReloader(engine, RELOAD_INTERVAL_SECONDS).start()
+
+REGISTRY.describe("http_requests_total", "HTTP requests by route, method and status code.")
+REGISTRY.describe("http_request_errors_total", "HTTP requests that ended in a 5xx response.")
+REGISTRY.describe("http_request_duration_seconds", "HTTP request latency by route.")
+if engine is not None:
+    REGISTRY.register_collector(engine.collect_metrics)
+if reloader is not None:
+    REGISTRY.register_collector(lambda: [
+        ("engine_internship_reloads", {}, reloader.reloads),
+        ("engine_internship_reload_failures", {}, reloader.failures),
+        ("engine_internship_last_rebuild_seconds", {}, reloader.last_rebuild_seconds or 0.0),
+    ])
+
+
+def resume_cache_metrics():
+    # The parser (and spaCy) is imported by the first resume request, not at startup.
+    parser = sys.modules.get("resume_parser")
+    if parser is None or parser.RESUME_CACHE is None:
+        return []
+    return [(f"resume_cache_{key}", {}, value) for key, value in parser.RESUME_CACHE.stats().items()]
+
+
+REGISTRY.register_collector(resume_cache_metrics)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.before_request
+def refresh_shared_engine():
+    # Re-attach if another worker has published a newer engine generation.
+    if engine is not None and engine.shared_state is not None:
+        engine.refresh_shared_state()
+
+
+@app.before_request
+def pin_engine_snapshot():
+    # Every engine read in this request sees one snapshot, even if a write lands meanwhile.
+    if engine is not None:
+        g.engine_snapshot = engine.pinned()
+        g.engine_snapshot.__enter__()
+
+
+@app.teardown_request
+def unpin_engine_snapshot(exc):
+    pin = g.pop("engine_snapshot", None)
+    if pin is not None:
+        pin.__exit__(None, None, None)
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Label by the URL rule, not the raw path, so IDs in paths do not create new series.
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REGISTRY.inc("http_requests_total", route=route, method=request.method, status=response.status_code)
+    if response.status_code >= 500:
+        REGISTRY.inc("http_request_errors_total", route=route, method=request.method)
+    if "request_started" in g:
+        REGISTRY.observe("http_request_duration_seconds", time.perf_counter() - g.request_started, route=route)
+    return response
 
 
 # --- Helper Function to handle engine errors ---
@@ -38,6 +138,68 @@ def check_engine():
     return None, None
 
 
+def requested_fields(schema):
+    """The optional fields= projection, from the query string or a JSON body's 'fields'."""
+    raw = request.args.get('fields')
+    if raw is None and request.is_json:
+        raw = (request.get_json(silent=True) or {}).get('fields')
+    return parse_fields(raw, schema)
+
+
+def records_response(df, schema=None):
+    """
+    JSON array of the rows of `df`, limited to the public `schema` columns (all
+    columns when None) and narrowed further by the request's fields= projection.
+    """
+    try:
+        fields = requested_fields(schema if schema is not None else list(df.columns))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with stage_timer("serialize"):
+        return Response(records_json(project(df, schema, fields)), mimetype='application/json')
+
+
+def positive_int(data, key, default):
+    """data[key] as an integer >= 1 (default when absent); ValueError otherwise."""
+    value = data.get(key, default)
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"'{key}' must be a positive integer.")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be a positive integer.")
+    if value < 1:
+        raise ValueError(f"'{key}' must be a positive integer.")
+    return value
+
+
+def parse_filters(source):
+    """
+    Builds an engine filter dict from query args or a JSON object. Categorical
+    filters accept a single value, a comma-separated list or a JSON list;
+    'city' is accepted as an alias for 'location'. Raises ValueError for
+    anything that is not query args or a JSON object.
+    """
+    if not hasattr(source, 'getlist') and not isinstance(source, dict):
+        raise ValueError("filters must be an object")
+    filters = {}
+    for key in ['state', 'location', 'city', 'domain', 'company', 'duration']:
+        if hasattr(source, 'getlist'):
+            raw = [v for item in source.getlist(key) for v in item.split(',')]
+        else:
+            raw = source.get(key)
+            raw = [] if raw is None else [raw] if isinstance(raw, str) else list(raw)
+            if not all(isinstance(v, str) for v in raw):
+                raise ValueError(f"'{key}' filter values must be strings")
+        values = [v.strip() for v in raw if v and v.strip()]
+        if values:
+            filters.setdefault('location' if key == 'city' else key, []).extend(values)
+    for key in ['min_stipend', 'max_stipend']:
+        if source.get(key) not in (None, ''):
+            filters[key] = float(source.get(key))
+    return filters
+
+
 # --- 2. API Endpoints ---
 
 @app.route('/', methods=['GET'])
@@ -56,11 +218,18 @@ def get_recommendations_api():
     if student_id is None:
         return jsonify({"error": "Query parameter 'student_id' is required."}), 400
     try:
-        student_index = engine.students_df[engine.students_df['student_id'] == student_id].index[0]
-        recs = engine.get_recommendations(student_index)
-        return jsonify(recs.to_dict('records'))
-    except IndexError:
+        filters = parse_filters(request.args)
+    except ValueError:
+        return jsonify({"error": "Query parameters 'min_stipend' and 'max_stipend' must be numbers."}), 400
+    try:
+        top_n = positive_int(request.args, 'top_n', 5)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    student_index = engine.get_student_index(student_id)
+    if student_index is None:
         return jsonify({"error": f"Student ID {student_id} not found."}), 404
+    recs = engine.get_recommendations(student_index, top_n=top_n, filters=filters)
+    return records_response(recs, INTERNSHIP_FIELDS)
 
 
 @app.route('/student/recommendations/new_profile', methods=['POST'])
@@ -72,8 +241,99 @@ def get_new_profile_recommendations_api():
     if not data or not all(key in data for key in ['branch', 'skills', 'location_preference']):
         return jsonify({"error": "Request body must contain 'branch', 'skills', and 'location_preference'."}), 400
 
-    recs = engine.get_recommendations_for_new_profile(data)
-    return jsonify(recs.to_dict('records'))
+    try:
+        filters = parse_filters(data.get('filters') or {})
+    except (ValueError, TypeError):
+        return jsonify({"error": "'filters' must be an object of filter values."}), 400
+    try:
+        top_n = positive_int(data, 'top_n', 5)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    recs = engine.get_recommendations_for_new_profile(data, top_n=top_n, filters=filters)
+    return records_response(recs, INTERNSHIP_FIELDS)
+
+
+@app.route('/student/recommendations/batch', methods=['POST'])
+def get_batch_recommendations_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+
+    data = request.get_json(silent=True) or {}
+    student_ids = data.get('student_ids')
+    profiles = data.get('profiles')
+    if not isinstance(student_ids, list) and not isinstance(profiles, list):
+        return jsonify({"error": "Request body must contain a 'student_ids' or 'profiles' list."}), 400
+
+    try:
+        top_n = positive_int(data, 'top_n', 5)
+        chunk_size = positive_int(data, 'chunk_size', 1024)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        filters = dict(filters=parse_filters(data.get('filters') or {}))
+    except (ValueError, TypeError):
+        return jsonify({"error": "'filters' must be an object of filter values."}), 400
+    try:
+        fields = requested_fields(INTERNSHIP_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if isinstance(student_ids, list):
+        if not all(isinstance(sid, (int, float, str)) and not isinstance(sid, bool) for sid in student_ids):
+            return jsonify({"error": "'student_ids' must be a list of IDs."}), 400
+        positions = [engine.get_student_index(sid) for sid in student_ids]
+        found = [sid for sid, pos in zip(student_ids, positions) if pos is not None]
+        not_found = [sid for sid, pos in zip(student_ids, positions) if pos is None]
+        recs = engine.get_batch_recommendations(student_indices=[pos for pos in positions if pos is not None],
+                                                top_n=top_n, chunk_size=chunk_size, **filters)
+        keys = [{"student_id": sid} for sid in found]
+    else:
+        required = ['branch', 'skills', 'location_preference']
+        if not profiles:
+            return jsonify({"error": "'profiles' must be a non-empty list of objects."}), 400
+        if not all(isinstance(p, dict) and all(key in p for key in required) for p in profiles):
+            return jsonify({"error": "Each profile must contain 'branch', 'skills', and 'location_preference'."}), 400
+        not_found = []
+        recs = engine.get_batch_recommendations(profiles=profiles, top_n=top_n,
+                                                chunk_size=chunk_size, **filters)
+        keys = [{"profile_position": i} for i in range(len(profiles))]
+
+    with stage_timer("serialize"):
+        # Rows come grouped by query_position, so each query's records are one slice
+        # of a single vectorized to_json pass, spliced into the response text.
+        records = record_strings(project(recs, INTERNSHIP_FIELDS, fields))
+        bounds = np.searchsorted(recs['query_position'].to_numpy(), np.arange(len(keys) + 1))
+        results = ",".join(
+            json.dumps(key)[:-1] + ', "recommendations": [' + ",".join(records[bounds[i]:bounds[i + 1]]) + "]}"
+            for i, key in enumerate(keys)
+        )
+        body = '{"results": [' + results + '], "not_found": ' + json.dumps(not_found) + '}'
+        return Response(body, mimetype='application/json')
+
+
+@app.route('/internships/filter_options', methods=['GET'])
+def get_filter_options_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+
+    index = engine.filter_index
+    where = {'state': request.args['state']} if request.args.get('state') else {}
+    options = {col: index.values(col, **where) for col in index.CATEGORICAL_COLUMNS}
+    stipend_range = index.stipend_range()
+    options['stipend'] = {"min": stipend_range[0], "max": stipend_range[1]} if stipend_range else None
+    return jsonify(options)
+
+
+@app.route('/students/search', methods=['GET'])
+def search_students_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', default=10, type=int)
+    positions = engine.search_students(prefix, limit=limit)
+    matches = engine.students_df.iloc[positions]
+    return records_response(matches, ['student_id', 'name'])
 
 
 @app.route('/student/skill_gap', methods=['GET'])
@@ -85,13 +345,38 @@ def get_skill_gap_api():
     internship_id = request.args.get('internship_id', type=int)
     if not all([student_id, internship_id]):
         return jsonify({"error": "Query parameters 'student_id' and 'internship_id' are required."}), 400
-    try:
-        student_index = engine.students_df[engine.students_df['student_id'] == student_id].index[0]
-        internship_index = engine.internships_df[engine.internships_df['internship_id'] == internship_id].index[0]
-        gap = engine.get_skill_gap_analysis(student_index, internship_index)
-        return jsonify(gap)
-    except IndexError:
+    student_index = engine.get_student_index(student_id)
+    internship_index = engine.get_internship_index(internship_id)
+    if student_index is None or internship_index is None:
         return jsonify({"error": "Student or Internship ID not found."}), 404
+    gap = engine.get_skill_gap_analysis(student_index, internship_index)
+    return jsonify(gap)
+
+
+@app.route('/student/recommendations/skill_gaps', methods=['GET'])
+def get_recommendation_skill_gaps_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+
+    student_id = request.args.get('student_id', type=int)
+    if student_id is None:
+        return jsonify({"error": "Query parameter 'student_id' is required."}), 400
+    try:
+        filters = parse_filters(request.args)
+    except ValueError:
+        return jsonify({"error": "Query parameters 'min_stipend' and 'max_stipend' must be numbers."}), 400
+    student_index = engine.get_student_index(student_id)
+    if student_index is None:
+        return jsonify({"error": f"Student ID {student_id} not found."}), 404
+
+    try:
+        top_n = positive_int(request.args, 'top_n', 5)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    recs = engine.get_recommendations(student_index, top_n=top_n, filters=filters)
+    gaps = engine.get_skill_gap_batch(recs.index, student_index=student_index)
+    return jsonify([{"internship_id": int(internship_id), **gap}
+                    for internship_id, gap in zip(recs['internship_id'], gaps)])
 
 
 @app.route('/student/resume_suggestions', methods=['GET'])
@@ -104,15 +389,100 @@ def get_resume_suggestions_api():
     internship_id = request.args.get('internship_id', type=int)
     if not all([student_id, internship_id]):
         return jsonify({"error": "Query parameters 'student_id' and 'internship_id' are required."}), 400
-    try:
-        student_index = engine.students_df[engine.students_df['student_id'] == student_id].index[0]
-        internship_index = engine.internships_df[engine.internships_df['internship_id'] == internship_id].index[0]
-        suggestions = engine.get_resume_suggestions(API_KEY, student_index=student_index,
-                                                    internship_index=internship_index)
-        return jsonify({"suggestions": suggestions})
-    except IndexError:
+    student_index = engine.get_student_index(student_id)
+    internship_index = engine.get_internship_index(internship_id)
+    if student_index is None or internship_index is None:
+        return jsonify({"error": "Student or Internship ID not found."}), 404
+    suggestions = engine.get_resume_suggestions(API_KEY, student_index=student_index,
+                                                internship_index=internship_index)
+    return jsonify({"suggestions": suggestions})
+
+
+@app.route('/student/resume_suggestions', methods=['POST'])
+def submit_resume_suggestions_job_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+    if not API_KEY: return jsonify({"error": "API key not configured on the server."}), 500
+
+    data = request.get_json(silent=True) or {}
+    student_id = data.get('student_id', request.args.get('student_id', type=int))
+    internship_id = data.get('internship_id', request.args.get('internship_id', type=int))
+    if not all([student_id, internship_id]):
+        return jsonify({"error": "'student_id' and 'internship_id' are required."}), 400
+    if engine.get_student_index(student_id) is None or engine.get_internship_index(internship_id) is None:
         return jsonify({"error": "Student or Internship ID not found."}), 404
 
+    def run():
+        # Resolve the IDs when the job runs: rows can move while it waits in the queue.
+        with engine.pinned():
+            student_index = engine.get_student_index(student_id)
+            internship_index = engine.get_internship_index(internship_id)
+            if student_index is None or internship_index is None:
+                raise LookupError(f"Student {student_id} or internship {internship_id} no longer exists.")
+            return {"suggestions": engine.get_resume_suggestions(API_KEY, student_index=student_index,
+                                                                 internship_index=internship_index)}
+
+    job_id = job_queue.submit(run)
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_api(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found or expired."}), 404
+    return jsonify(job)
+
+
+# --- Resume Ingestion Endpoints ---
+
+@app.route('/resumes/batch', methods=['POST'])
+def ingest_resumes_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+    # Imported on first use: parsing needs spaCy and en_core_web_sm, which no other route does.
+    from resume_ingest import RESUME_EXTENSIONS, extract_resume_archive, ingest_resumes
+
+    archive = request.files.get('archive')
+    uploads = request.files.getlist('files')
+    if not archive and not uploads:
+        return jsonify({"error": "Upload a zip file as 'archive' and/or resumes as 'files'."}), 400
+
+    work_dir = tempfile.TemporaryDirectory(prefix="resume_batch_")
+    try:
+        paths = extract_resume_archive(archive.stream, work_dir.name) if archive else []
+        for position, upload in enumerate(uploads):
+            name = os.path.basename(upload.filename or "")
+            if not name.lower().endswith(RESUME_EXTENSIONS):
+                continue
+            upload_dir = os.path.join(work_dir.name, f"upload_{position:05d}")
+            os.makedirs(upload_dir)
+            upload.save(os.path.join(upload_dir, name))
+            paths.append(os.path.join(upload_dir, name))
+    except (ValueError, zipfile.BadZipFile) as e:
+        work_dir.cleanup()
+        return jsonify({"error": f"Could not read archive: {e}"}), 400
+
+    create_profiles = request.form.get('create_profiles', 'true').lower() != 'false'
+    profile_defaults = {key: request.form[key] for key in ['branch', 'location_preference'] if key in request.form}
+    timeout = request.form.get('timeout', default=30, type=float)
+
+    def generate():
+        # One JSON line per resume as it finishes, then a summary line.
+        counts = {}
+        try:
+            results = ingest_resumes(paths, engine=engine if create_profiles else None,
+                                     timeout=timeout, profile_defaults=profile_defaults)
+            # With shared state, each batch of new students is published as it is added.
+            for done, result in enumerate(results, start=1):
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+                yield json.dumps({**result, "progress": {"done": done, "total": len(paths)}}) + "\n"
+            yield json.dumps({"summary": {"total": len(paths), **counts}}) + "\n"
+        finally:
+            work_dir.cleanup()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 
 # --- Admin Endpoints ---
 
@@ -124,13 +494,11 @@ def get_top_candidates_api():
     internship_id = request.args.get('internship_id', type=int)
     if internship_id is None:
         return jsonify({"error": "Query parameter 'internship_id' is required."}), 400
-    try:
-        internship_index = \
-        analytics_engine.internships_df[analytics_engine.internships_df['internship_id'] == internship_id].index[0]
-        candidates = analytics_engine.find_top_candidates_for_internship(internship_index)
-        return jsonify(candidates.to_dict('records'))
-    except IndexError:
+    internship_index = engine.get_internship_index(internship_id)
+    if internship_index is None:
         return jsonify({"error": f"Internship ID {internship_id} not found."}), 404
+    candidates = analytics_engine.find_top_candidates_for_internship(internship_index)
+    return records_response(candidates, STUDENT_FIELDS)
 
 
 @app.route('/admin/skill_gap_report', methods=['GET'])
@@ -139,7 +507,7 @@ def get_skill_gap_report_api():
     if error: return jsonify(error), status
 
     report = analytics_engine.get_skill_demand_supply_gap()
-    return jsonify(report.to_dict('records'))
+    return records_response(report)
 
 
 @app.route('/admin/talent_heatmap', methods=['POST'])
@@ -153,7 +521,22 @@ def get_talent_heatmap_api():
 
     heatmap_data = analytics_engine.get_talent_heatmap_data(data['skills'])
     heatmap_data = heatmap_data.reset_index()  # Convert index to column for JSON
-    return jsonify(heatmap_data.to_dict('records'))
+    return records_response(heatmap_data)
+
+
+@app.route('/admin/reload_status', methods=['GET'])
+def reload_status_api():
+    error, status = check_engine()
+    if error: return jsonify(error), status
+    if reloader is None:
+        return jsonify({"error": "Hot reload is disabled (ENGINE_RELOAD_INTERVAL=0)."}), 404
+    return jsonify(reloader.status())
+
+
+# --- Monitoring ---
+@app.route('/metrics', methods=['GET'])
+def metrics_api():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 
 # --- 3. Run the Flask App Server ---
@@ -8,8 +8,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import random
 import time
-from resume_parser import extract_skills_from_resume
-import os
+from resume_parser import extract_skills_from_bytes
+from jobs import JobQueue
 
 # --- Page Setup ---
 st.set_page_config(
@@ -205,6 +205,21 @@ def load_recommendation_engine(students_df, internships_df):
     """Initializes the main recommendation engine."""
     return RecommendationEngine(students_df, internships_df)
 
+@st.cache_resource
+def load_job_queue():
+    """Background workers for slow AI calls, shared across reruns and sessions."""
+    return JobQueue(max_workers=2)
+
+def resume_suggestions_job(api_key, internship_id, student_id=None, new_profile_data=None):
+    """Job body for the AI Resume Helper; takes IDs because rows can move while it is queued."""
+    with engine.pinned():
+        internship_index = engine.get_internship_index(internship_id)
+        student_index = None if student_id is None else engine.get_student_index(student_id)
+        if internship_index is None or (student_id is not None and student_index is None):
+            return "Could not generate resume suggestions: the student or internship no longer exists."
+        return engine.get_resume_suggestions(api_key, internship_index=internship_index,
+                                             student_index=student_index, new_profile_data=new_profile_data)
+
 # --- Main App Logic ---
 students_df, internships_df = load_data()
 
@@ -213,6 +228,7 @@ if students_df is None or internships_df is None:
     st.stop()
 
 engine = load_recommendation_engine(students_df.copy(), internships_df.copy())
+job_queue = load_job_queue()
 
 
 # --- Initialize Session State ---
@@ -329,7 +345,7 @@ elif st.session_state.role == "Student":
                     student_names = engine.students_df['name'].tolist()
                     selected_student_name = st.selectbox("Select your profile:", options=student_names)
                     if st.button("Get Recommendations", use_container_width=True, type="primary"):
-                        student_index = engine.students_df[engine.students_df['name'] == selected_student_name].index[0]
+                        student_index = engine.find_students_by_name(selected_student_name)[0]
                         st.session_state.student_index = student_index
                         st.session_state.new_profile_data = None
                         st.session_state.selected_student_name = selected_student_name
@@ -346,11 +362,12 @@ elif st.session_state.role == "Student":
                         submitted = st.form_submit_button("Find Internships", use_container_width=True, type="primary")
                         if submitted:
                             if name and branch and resume_file:
-                                if not os.path.exists("temp_resumes"): os.makedirs("temp_resumes")
-                                file_path = os.path.join("temp_resumes", resume_file.name)
-                                with open(file_path, "wb") as f: f.write(resume_file.getbuffer())
                                 with st.spinner("🚀 Our AI is analyzing your resume..."):
-                                    extracted_skills = extract_skills_from_resume(file_path)
+                                    try:
+                                        extracted_skills = extract_skills_from_bytes(resume_file.getvalue(), resume_file.name)
+                                    except ValueError as e:
+                                        st.error(str(e))
+                                        extracted_skills = []
                                     skills_str = ", ".join(extracted_skills)
                                 if not extracted_skills:
                                     st.warning("Could not extract skills. Ensure resume is text-based.")
@@ -399,11 +416,11 @@ elif st.session_state.role == "Student":
                     st.session_state.recommendations = engine.get_recommendations_for_new_profile(st.session_state.new_profile_data)
             
             st.sidebar.header("🔍 Filters")
-            all_states = ["All India"] + sorted(engine.internships_df['state'].unique().tolist())
+            all_states = ["All India"] + engine.filter_index.values('state')
             state_filter = st.sidebar.selectbox("State", options=all_states)
             city_filter = "All Cities"
             if state_filter != "All India":
-                cities_in_state = ["All Cities"] + sorted(engine.internships_df[engine.internships_df['state'] == state_filter]['location'].unique().tolist())
+                cities_in_state = ["All Cities"] + engine.filter_index.values('location', state=state_filter)
                 city_filter = st.sidebar.selectbox("City", options=cities_in_state)
             
             if st.sidebar.button("Apply Filters", use_container_width=True):
@@ -467,8 +484,11 @@ elif st.session_state.role == "Student":
                                         st.markdown("<h6>Skill Gap Analysis</h6>", unsafe_allow_html=True)
                                         if st.button("Analyze Skill Gap", key=f"gap_{index}", use_container_width=True):
                                             with st.spinner("Analyzing..."):
-                                                student_data = engine.students_df.iloc[st.session_state.student_index] if st.session_state.student_index is not None else st.session_state.new_profile_data
-                                                st.session_state.skill_gap_result = engine.get_skill_gap_analysis(student_data, index)
+                                                if st.session_state.get('skill_gaps_for') is not recs:
+                                                    gaps = engine.get_skill_gap_batch(recs.index, student_index=st.session_state.student_index, new_profile_data=st.session_state.new_profile_data)
+                                                    st.session_state.skill_gaps = dict(zip(recs.index, gaps))
+                                                    st.session_state.skill_gaps_for = recs
+                                                st.session_state.skill_gap_result = st.session_state.skill_gaps[index]
                                         if st.session_state.skill_gap_result:
                                             res = st.session_state.skill_gap_result
                                             st.metric(label="Your Skill Match", value=f"{res['match_percentage']:.2f}%")
@@ -483,9 +503,16 @@ elif st.session_state.role == "Student":
                                     with st.container(border=True):
                                         st.markdown("<h6>AI Resume Helper</h6>", unsafe_allow_html=True)
                                         if st.button("Generate Suggestions", key=f"resume_{index}", use_container_width=True, disabled=(not api_key)):
-                                            with st.spinner("Generating..."):
-                                                student_data = engine.students_df.iloc[st.session_state.student_index] if st.session_state.student_index is not None else st.session_state.new_profile_data
-                                                st.session_state.resume_suggestions = engine.get_resume_suggestions(api_key, internship_index=index, student_data=student_data)
+                                            st.session_state.resume_suggestions = None
+                                            st.session_state.resume_job_id = job_queue.submit(resume_suggestions_job, api_key, int(row['internship_id']), student_id=None if st.session_state.student_index is None else int(engine.students_df.iloc[st.session_state.student_index]['student_id']), new_profile_data=st.session_state.new_profile_data)
+                                        if st.session_state.get('resume_job_id'):
+                                            job = job_queue.get(st.session_state.resume_job_id)
+                                            if job is not None and job['status'] in ('queued', 'running'):
+                                                st.info("⏳ Generating suggestions...")
+                                                time.sleep(1)
+                                                st.rerun()
+                                            st.session_state.resume_suggestions = job['result'] if job and job['status'] == 'succeeded' else "Could not generate resume suggestions."
+                                            st.session_state.resume_job_id = None
                                         if st.session_state.resume_suggestions:
                                             st.markdown(st.session_state.resume_suggestions)
                                         if not api_key: st.warning("Add Google AI API key to enable.")
@@ -617,8 +644,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import random
 import time
-from resume_parser import extract_skills_from_resume
-import os
+from resume_parser import extract_skills_from_bytes
+from jobs import JobQueue
 
 # --- Page Setup ---
 st.set_page_config(
@@ -820,6 +847,21 @@ def load_recommendation_engine(students_df, internships_df):
     """Initializes the main recommendation engine."""
     return RecommendationEngine(students_df, internships_df)
 
+@st.cache_resource
+def load_job_queue():
+    """Background workers for slow AI calls, shared across reruns and sessions."""
+    return JobQueue(max_workers=2)
+
+def resume_suggestions_job(api_key, internship_id, student_id=None, new_profile_data=None):
+    """Job body for the AI Resume Helper; takes IDs because rows can move while it is queued."""
+    with engine.pinned():
+        internship_index = engine.get_internship_index(internship_id)
+        student_index = None if student_id is None else engine.get_student_index(student_id)
+        if internship_index is None or (student_id is not None and student_index is None):
+            return "Could not generate resume suggestions: the student or internship no longer exists."
+        return engine.get_resume_suggestions(api_key, internship_index=internship_index,
+                                             student_index=student_index, new_profile_data=new_profile_data)
+
 # --- Main App Logic ---
 students_df, internships_df = load_data()
 
@@ -828,6 +870,7 @@ if students_df is None or internships_df is None:
     st.stop()
 
 engine = load_recommendation_engine(students_df.copy(), internships_df.copy())
+job_queue = load_job_queue()
 
 
 # --- Initialize Session State ---
@@ -944,7 +987,7 @@ elif st.session_state.role == "Student":
                     student_names = engine.students_df['name'].tolist()
                     selected_student_name = st.selectbox("Select your profile:", options=student_names)
                     if st.button("Get Recommendations", use_container_width=True, type="primary"):
-                        student_index = engine.students_df[engine.students_df['name'] == selected_student_name].index[0]
+                        student_index = engine.find_students_by_name(selected_student_name)[0]
                         st.session_state.student_index = student_index
                         st.session_state.new_profile_data = None
                         st.session_state.selected_student_name = selected_student_name
@@ -961,11 +1004,12 @@ elif st.session_state.role == "Student":
                         submitted = st.form_submit_button("Find Internships", use_container_width=True, type="primary")
                         if submitted:
                             if name and branch and resume_file:
-                                if not os.path.exists("temp_resumes"): os.makedirs("temp_resumes")
-                                file_path = os.path.join("temp_resumes", resume_file.name)
-                                with open(file_path, "wb") as f: f.write(resume_file.getbuffer())
                                 with st.spinner("🚀 Our AI is analyzing your resume..."):
-                                    extracted_skills = extract_skills_from_resume(file_path)
+                                    try:
+                                        extracted_skills = extract_skills_from_bytes(resume_file.getvalue(), resume_file.name)
+                                    except ValueError as e:
+                                        st.error(str(e))
+                                        extracted_skills = []
                                     skills_str = ", ".join(extracted_skills)
                                 if not extracted_skills:
                                     st.warning("Could not extract skills. Ensure resume is text-based.")
@@ -1014,11 +1058,11 @@ elif st.session_state.role == "Student":
                     st.session_state.recommendations = engine.get_recommendations_for_new_profile(st.session_state.new_profile_data)
             
             st.sidebar.header("🔍 Filters")
-            all_states = ["All India"] + sorted(engine.internships_df['state'].unique().tolist())
+            all_states = ["All India"] + engine.filter_index.values('state')
             state_filter = st.sidebar.selectbox("State", options=all_states)
             city_filter = "All Cities"
             if state_filter != "All India":
-                cities_in_state = ["All Cities"] + sorted(engine.internships_df[engine.internships_df['state'] == state_filter]['location'].unique().tolist())
+                cities_in_state = ["All Cities"] + engine.filter_index.values('location', state=state_filter)
                 city_filter = st.sidebar.selectbox("City", options=cities_in_state)
             
             if st.sidebar.button("Apply Filters", use_container_width=True):
@@ -1082,8 +1126,11 @@ elif st.session_state.role == "Student":
                                         st.markdown("<h6>Skill Gap Analysis</h6>", unsafe_allow_html=True)
                                         if st.button("Analyze Skill Gap", key=f"gap_{index}", use_container_width=True):
                                             with st.spinner("Analyzing..."):
-                                                student_data = engine.students_df.iloc[st.session_state.student_index] if st.session_state.student_index is not None else st.session_state.new_profile_data
-                                                st.session_state.skill_gap_result = engine.get_skill_gap_analysis(student_data, index)
+                                                if st.session_state.get('skill_gaps_for') is not recs:
+                                                    gaps = engine.get_skill_gap_batch(recs.index, student_index=st.session_state.student_index, new_profile_data=st.session_state.new_profile_data)
+                                                    st.session_state.skill_gaps = dict(zip(recs.index, gaps))
+                                                    st.session_state.skill_gaps_for = recs
+                                                st.session_state.skill_gap_result = st.session_state.skill_gaps[index]
                                         if st.session_state.skill_gap_result:
                                             res = st.session_state.skill_gap_result
                                             st.metric(label="Your Skill Match", value=f"{res['match_percentage']:.2f}%")
@@ -1098,9 +1145,16 @@ elif st.session_state.role == "Student":
                                     with st.container(border=True):
                                         st.markdown("<h6>AI Resume Helper</h6>", unsafe_allow_html=True)
                                         if st.button("Generate Suggestions", key=f"resume_{index}", use_container_width=True, disabled=(not api_key)):
-                                            with st.spinner("Generating..."):
-                                                student_data = engine.students_df.iloc[st.session_state.student_index] if st.session_state.student_index is not None else st.session_state.new_profile_data
-                                                st.session_state.resume_suggestions = engine.get_resume_suggestions(api_key, internship_index=index, student_data=student_data)
+                                            st.session_state.resume_suggestions = None
+                                            st.session_state.resume_job_id = job_queue.submit(resume_suggestions_job, api_key, int(row['internship_id']), student_id=None if st.session_state.student_index is None else int(engine.students_df.iloc[st.session_state.student_index]['student_id']), new_profile_data=st.session_state.new_profile_data)
+                                        if st.session_state.get('resume_job_id'):
+                                            job = job_queue.get(st.session_state.resume_job_id)
+                                            if job is not None and job['status'] in ('queued', 'running'):
+                                                st.info("⏳ Generating suggestions...")
+                                                time.sleep(1)
+                                                st.rerun()
+                                            st.session_state.resume_suggestions = job['result'] if job and job['status'] == 'succeeded' else "Could not generate resume suggestions."
+                                            st.session_state.resume_job_id = None
                                         if st.session_state.resume_suggestions:
                                             st.markdown(st.session_state.resume_suggestions)
                                         if not api_key: st.warning("Add Google AI API key to enable.")
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+
+# Bump whenever preprocessing or the saved layout changes so old artifacts are rebuilt.
+ARTIFACT_VERSION = "engine-artifacts-v2"
+
+MATRIX_NAMES = [
+    "student_vectors",
+    "internship_vectors",
+    "student_skill_vectors",
+    "internship_skill_vectors",
+]
+
+
+def fingerprint_files(*paths):
+    """Hash of the input files' bytes, the artifact layout version and the sklearn version."""
+    digest = hashlib.sha256(f"{ARTIFACT_VERSION}|sklearn={sklearn.__version__}".encode())
+    for path in paths:
+        digest.update(b"\0" + os.path.basename(path).encode() + b"\0")
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+class ArtifactStore:
+    """
+    Fitted engine state on disk, one sub-directory per input fingerprint: the two
+    vectorizers (pickled), the sparse matrices as raw .npy arrays that load
+    memory-mapped, and the skill vocabulary. Directories are written under a
+    temporary name and renamed into place, so a reader never sees half of one.
+    """
+
+    def __init__(self, directory="artifacts"):
+        self.directory = directory
+
+    def _path(self, fingerprint, name=""):
+        return os.path.join(self.directory, fingerprint, name)
+
+    def exists(self, fingerprint):
+        return os.path.isfile(self._path(fingerprint, "manifest.json"))
+
+    def save(self, fingerprint, vectorizer, skill_vectorizer, matrices, skills_vocabulary):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_dir = os.path.join(self.directory, f".{fingerprint}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        with open(os.path.join(tmp_dir, "vectorizers.pkl"), 'wb') as f:
+            pickle.dump({"profile": vectorizer, "skills": skill_vectorizer}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        shapes = {}
+        for name in MATRIX_NAMES:
+            matrix = matrices[name].tocsr()
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(tmp_dir, f"{name}.{part}.npy"), getattr(matrix, part))
+            shapes[name] = list(matrix.shape)
+        with open(os.path.join(tmp_dir, "skills_vocabulary.json"), 'w') as f:
+            json.dump(sorted(skills_vocabulary), f)
+        with open(os.path.join(tmp_dir, "manifest.json"), 'w') as f:
+            json.dump(
+                {
+                    "fingerprint": fingerprint,
+                    "version": ARTIFACT_VERSION,
+                    "sklearn": sklearn.__version__,
+                    "created_at": time.time(),
+                    "shapes": shapes,
+                },
+                f,
+            )
+
+        target = self._path(fingerprint)
+        shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, target)
+        except OSError:
+            # Another process published the same fingerprint first; theirs is as good.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, fingerprint, mmap=True):
+        """
+        Returns (profile_vectorizer, skill_vectorizer, matrices, skills_vocabulary).
+        With `mmap`, matrix arrays are read-only memory maps of the .npy files.
+        """
+        with open(self._path(fingerprint, "manifest.json"), 'r') as f:
+            manifest = json.load(f)
+        with open(self._path(fingerprint, "vectorizers.pkl"), 'rb') as f:
+            vectorizers = pickle.load(f)
+        mmap_mode = "r" if mmap else None
+        matrices = {}
+        for name in MATRIX_NAMES:
+            parts = [
+                np.load(self._path(fingerprint, f"{name}.{part}.npy"), mmap_mode=mmap_mode)
+                for part in ("data", "indices", "indptr")
+            ]
+            matrices[name] = sp.csr_matrix(tuple(parts), shape=tuple(manifest["shapes"][name]), copy=False)
+        with open(self._path(fingerprint, "skills_vocabulary.json"), 'r') as f:
+            skills_vocabulary = set(json.load(f))
+        return vectorizers["profile"], vectorizers["skills"], matrices, skills_vocabulary
+
+    def drop_others(self, fingerprint):
+        """Removes artifact directories for every other fingerprint."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name != fingerprint and not name.startswith("."):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
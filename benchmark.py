@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from Demo_data import generate_load_test_data
+from admin_engine import AnalyticsEngine
+from engine import RecommendationEngine
+from llm_client import SuggestionCache
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+NEW_PROFILE = {
+    "name": "Benchmark Student",
+    "branch": "Computer Science",
+    "skills": "Python, Machine Learning, SQL, React",
+    "location_preference": "Pune",
+    "cgpa": 8.5,
+}
+
+
+def _measure(fn, repeat):
+    """Wall times of `repeat` calls, then one more call under tracemalloc for peak memory."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.mean(times),
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def _engine_benchmarks(data_dir, cache):
+    students = os.path.join(data_dir, "students.csv")
+    internships = os.path.join(data_dir, "internships.csv")
+    artifact_dir = os.path.join(data_dir, "artifacts")
+
+    def build(artifacts):
+        return RecommendationEngine(
+            students, internships, suggestion_cache=cache, artifact_dir=artifact_dir if artifacts else None
+        )
+
+    engine = build(artifacts=True)
+    analytics = AnalyticsEngine(engine)
+    return {
+        "engine_init": lambda: build(artifacts=False),
+        "engine_init_from_artifacts": lambda: build(artifacts=True),
+        "get_recommendations": lambda: engine.get_recommendations(0, top_n=10),
+        "get_recommendations_for_new_profile": lambda: engine.get_recommendations_for_new_profile(
+            dict(NEW_PROFILE), top_n=10
+        ),
+        "get_skill_gap_analysis": lambda: engine.get_skill_gap_analysis(0, 0),
+        "add_new_student": lambda: engine.add_new_student(dict(NEW_PROFILE)),
+        "find_top_candidates_for_internship": lambda: analytics.find_top_candidates_for_internship(0, top_n=10),
+        "get_skill_demand_supply_gap": analytics.get_skill_demand_supply_gap,
+        "get_talent_heatmap_data": analytics.get_talent_heatmap_data,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeat=5, seed=42, only=None, internship_ratio=0.1):
+    """
+    Runs every benchmark at each dataset size (number of students; internships are
+    `internship_ratio` of that) on freshly generated data, and returns the results.
+    """
+    results = []
+    for size in sizes:
+        n_internships = max(1, int(size * internship_ratio))
+        with tempfile.TemporaryDirectory() as data_dir:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_load_test_data(size, n_internships, seed=seed, output_dir=data_dir)
+            cache = SuggestionCache(path=os.path.join(data_dir, "suggestions.sqlite"))
+            for name, fn in _engine_benchmarks(data_dir, cache).items():
+                if only and name not in only:
+                    continue
+                result = {"benchmark": name, "students": size, "internships": n_internships}
+                result.update(_measure(fn, repeat))
+                results.append(result)
+                print(
+                    f"{name:<40} {size:>9} students  median {result['median_s'] * 1000:10.2f} ms"
+                    f"  peak {result['peak_mb']:9.1f} MB"
+                )
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def compare(baseline, results):
+    """Prints the median-time ratio (new / baseline) of every benchmark present in both runs."""
+    old = {(r["benchmark"], r["students"]): r for r in baseline["results"]}
+    for r in results:
+        before = old.get((r["benchmark"], r["students"]))
+        if before:
+            ratio = r["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+            print(f"{r['benchmark']:<40} {r['students']:>9} students  {ratio:6.2f}x baseline time")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation and analytics engines.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Student counts to run at.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.seed, args.only)
+    with open(args.output, 'w') as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(json.load(f), results)
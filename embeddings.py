@@ -0,0 +1,100 @@
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+
+class DenseVectors:
+    """
+    Row vectors in the reduced space, stored as float32 or, when quantized, as int8
+    with one float32 scale per row (row ~= scale * int8 values). Scoring runs as
+    dense matrix products, `chunk_size` rows at a time so int8 rows are only
+    widened one block at a time.
+    """
+
+    def __init__(self, values, scales=None):
+        self.values = values
+        self.scales = scales
+
+    @classmethod
+    def encode(cls, rows, quantize=False):
+        rows = np.asarray(rows, dtype=np.float32)
+        if not quantize:
+            return cls(rows)
+        scales = np.abs(rows).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        values = np.round(rows / scales[:, None]).astype(np.int8)
+        return cls(values, scales.astype(np.float32))
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def append(self, other):
+        scales = None if self.scales is None else np.concatenate([self.scales, other.scales])
+        return DenseVectors(np.vstack([self.values, other.values]), scales)
+
+    def select(self, rows):
+        """The subset of rows picked by a position array or boolean mask."""
+        return DenseVectors(self.values[rows], None if self.scales is None else self.scales[rows])
+
+    def scores(self, queries, rows=None, chunk_size=65536):
+        """(queries x rows) dot products against `rows` (positions; None for all)."""
+        values = self.values if rows is None else self.values[rows]
+        scales = self.scales if rows is None or self.scales is None else self.scales[rows]
+        if scales is None:
+            return queries @ values.T
+        out = np.empty((queries.shape[0], values.shape[0]), dtype=np.float32)
+        for start in range(0, values.shape[0], chunk_size):
+            block = values[start : start + chunk_size].astype(np.float32)
+            out[:, start : start + chunk_size] = (queries @ block.T) * scales[start : start + chunk_size]
+        return out
+
+
+class DenseProjection:
+    """
+    Truncated SVD of the TF-IDF space: projects sparse profile vectors onto
+    `n_components` float32 dimensions and re-normalizes them, so dot products in
+    the reduced space approximate the original cosine similarities.
+    """
+
+    def __init__(self, n_components=128, quantize=False, random_state=0):
+        self.n_components = n_components
+        self.quantize = quantize
+        self.random_state = random_state
+        self.svd = None
+
+    def fit(self, vectors):
+        n_components = max(1, min(self.n_components, vectors.shape[1] - 1, vectors.shape[0] - 1))
+        self.svd = TruncatedSVD(n_components=n_components, random_state=self.random_state).fit(vectors)
+        return self
+
+    @property
+    def explained_variance(self):
+        return float(self.svd.explained_variance_ratio_.sum())
+
+    def transform(self, vectors):
+        return normalize(self.svd.transform(vectors)).astype(np.float32)
+
+    def encode(self, vectors):
+        return DenseVectors.encode(self.transform(vectors), self.quantize)
+
+
+def score_drift(exact_scores, dense_scores, top_n=10):
+    """
+    How far dense scores stray from the exact ones for the same queries: mean and
+    max absolute score error, and the mean share of each query's exact top_n that
+    the dense top_n keeps.
+    """
+    error = np.abs(np.asarray(exact_scores) - np.asarray(dense_scores))
+    exact_top = np.argsort(-exact_scores, axis=1, kind="stable")[:, :top_n]
+    dense_top = np.argsort(-dense_scores, axis=1, kind="stable")[:, :top_n]
+    overlap = [len(np.intersect1d(a, b)) / max(1, len(a)) for a, b in zip(exact_top, dense_top)]
+    return {
+        "mean_abs_error": float(error.mean()) if error.size else 0.0,
+        "max_abs_error": float(error.max()) if error.size else 0.0,
+        "top_n_overlap": float(np.mean(overlap)) if overlap else 1.0,
+    }
@@ -1,25 +1,300 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import urllib.parse
-import google.generativeai as genai
 import logging
 import json
+import copy
+import time
+from contextlib import contextmanager
+
+from ann_index import IVFIndex
+from artifacts import ArtifactStore, MATRIX_NAMES
+from embeddings import DenseProjection, score_drift
+from indexes import EntityIndex, FilterIndex
+from llm_client import (
+    BoundedLLMClient,
+    GeminiModelClient,
+    SuggestionCache,
+    build_suggestion_prompt,
+    suggestion_cache_key,
+)
+from metrics import stage_timer
+from online_vectorizer import OnlineTfidfVectorizer
+from shared_state import SharedEngineState
+from snapshot import SnapshotCell, reads_snapshot, snapshot_field, writes_snapshot
+from storage import CSVStorage, INTERNSHIPS, STUDENTS
 
 
 class RecommendationEngine:
-    def __init__(self, student_filepath, internship_filepath):
+    # Data, vectors and indexes live in an immutable EngineSnapshot (snapshot.py).
+    # These attributes read the current snapshot and can only be assigned inside a write.
+    students_df = snapshot_field("students_df")
+    internships_df = snapshot_field("internships_df")
+    vectorizer = snapshot_field("vectorizer")
+    skill_vectorizer = snapshot_field("skill_vectorizer")
+    student_vectors = snapshot_field("student_vectors")
+    internship_vectors = snapshot_field("internship_vectors")
+    student_skill_vectors = snapshot_field("student_skill_vectors")
+    internship_skill_vectors = snapshot_field("internship_skill_vectors")
+    skills_vocabulary = snapshot_field("skills_vocabulary")
+    skill_feature_names = snapshot_field("skill_feature_names")
+    filter_index = snapshot_field("filter_index")
+    student_lookup = snapshot_field("student_lookup")
+    internship_lookup = snapshot_field("internship_lookup")
+    ann_index = snapshot_field("ann_index")
+    dense = snapshot_field("dense")
+    dense_student_vectors = snapshot_field("dense_student_vectors")
+    dense_internship_vectors = snapshot_field("dense_internship_vectors")
+    _drift = snapshot_field("drift")
+    stored_student_columns = snapshot_field("stored_student_columns")
+    stored_internship_columns = snapshot_field("stored_internship_columns")
+    load_report = snapshot_field("load_report")
+    dense_report = snapshot_field("dense_report")
+    refit_count = snapshot_field("refit_count")
+    shared_generation = snapshot_field("shared_generation")
+    shared_rows = snapshot_field("shared_rows")
+    data_versions = snapshot_field("data_versions")
+
+    def __init__(
+        self,
+        student_filepath="students.csv",
+        internship_filepath="internships.csv",
+        incremental=True,
+        refit_drift_threshold=0.1,
+        llm_client=None,
+        suggestion_cache=None,
+        artifact_dir="artifacts",
+        storage=None,
+        retrieval="exact",
+        ann_lists=None,
+        ann_probe=8,
+        dense_dims=None,
+        dense_quantize=False,
+        vectorizer_mode="tfidf",
+        shared_state=None,
+    ):
+        """
+        Data is read from and new students are appended to `storage` (see storage.py);
+        the default is a CSVStorage over the two file paths.
+
+        `incremental` makes add_new_student transform new profiles with the fitted
+        vocabulary instead of refitting; a full refit runs once the vocabulary or IDF
+        drift reported by vocabulary_drift() exceeds `refit_drift_threshold`.
+
+        `llm_client` (default: a rate-limited BoundedLLMClient around Gemini) generates
+        resume suggestions and `suggestion_cache` (default SuggestionCache) persists
+        them; pass a client with a fake model factory to run without Gemini.
+
+        Fitted vectorizers and matrices are saved under `artifact_dir`, keyed by a
+        fingerprint of the stored data, and loaded (memory-mapped) on the next start
+        instead of refitting; `load_report` says which path was taken. Pass None to
+        always fit in memory.
+
+        `retrieval="ivf"` builds an IVFIndex (ann_index.py) over the internship vectors
+        with `ann_lists` clusters (default sqrt of the catalogue size), and single-query
+        recommendations score only the rows of the `ann_probe` nearest clusters. More
+        probes mean better recall and slower queries; "exact" (the default) scores every row.
+
+        `dense_dims` (e.g. 128) scores in a float32 truncated-SVD space instead of the
+        sparse TF-IDF space, int8-quantized with `dense_quantize`; `dense_report` holds
+        how far those scores drift from exact cosine (see dense_score_drift()).
+
+        `vectorizer_mode="hashing"` replaces the fitted-vocabulary TfidfVectorizers with
+        OnlineTfidfVectorizers (online_vectorizer.py): new tokens need no refit, and
+        adding or removing a student or internship updates the IDF counters in
+        O(profile size). Rows vectorized earlier keep their weights until the IDF drift
+        passes `refit_drift_threshold`, which re-weights everything from the counters.
+
+        `shared_state` (a SharedEngineState or its directory) shares one copy of the
+        data and fitted matrices between server worker processes: the first worker
+        builds and publishes them, the others attach to the memory-mapped files, and
+        refresh_shared_state() re-attaches whenever another worker has published a
+        newer generation. A generation built from data that has since changed in
+        storage is rebuilt and republished by the next engine to start. Adds take
+        the shared lock, start from the latest generation and publish the result,
+        so new IDs are unique across workers. IVF and dense structures are still
+        built per process.
+
+        Writes (add_new_student, add_internship, remove_*, refit) build the next
+        snapshot aside and swap it in when they complete, one writer at a time;
+        reads never lock and each public read runs against one snapshot. Use
+        `with engine.pinned():` to keep one snapshot across several calls.
+        """
+        self._state = SnapshotCell()
         self._setup_logging()
         logging.info("Initializing the AI Recommendation Engine...")
 
-        self.students_df, self.internships_df = self._load_and_preprocess_data(
-            student_filepath, internship_filepath
-        )
-        self._create_feature_vectors()
+        self.student_filepath = student_filepath
+        self.internship_filepath = internship_filepath
+        self.incremental = incremental
+        self.refit_drift_threshold = refit_drift_threshold
+        self.llm_client = llm_client or BoundedLLMClient(GeminiModelClient())
+        self.suggestion_cache = suggestion_cache or SuggestionCache()
+        self.artifact_store = ArtifactStore(artifact_dir) if artifact_dir else None
+        self.storage = storage or CSVStorage(student_filepath, internship_filepath)
+        if retrieval not in ("exact", "ivf"):
+            raise ValueError(f"Unknown retrieval mode: {retrieval}")
+        self.retrieval = retrieval
+        self.ann_lists = ann_lists
+        self.ann_probe = ann_probe
+        self.dense_dims = dense_dims
+        self.dense_quantize = dense_quantize
+        if vectorizer_mode not in ("tfidf", "hashing"):
+            raise ValueError(f"Unknown vectorizer mode: {vectorizer_mode}")
+        if retrieval == "ivf" and vectorizer_mode == "hashing":
+            # k-means centroids over 2**20 hashed features would be dense and far too large.
+            raise ValueError('retrieval="ivf" does not support vectorizer_mode="hashing"')
+        self.vectorizer_mode = vectorizer_mode
+        if isinstance(shared_state, str):
+            shared_state = SharedEngineState(shared_state)
+        self.shared_state = shared_state
+        with self._state.writing():
+            self.refit_count = 0
+
+        if self.shared_state is None:
+            self._load_and_index()
+        else:
+            with self.shared_state.lock():
+                # Nothing published yet, or it holds data that has changed in storage since.
+                if self.shared_state.data_versions() != self._storage_versions() or not self.refresh_shared_state():
+                    self._load_and_index()
+                    self.publish_shared_state()
 
         logging.info("Engine initialized successfully.")
 
+    @property
+    def snapshot(self):
+        """The EngineSnapshot that reads on this thread currently see."""
+        return self._state.current
+
+    def pinned(self):
+        """Context manager: engine reads on this thread use one snapshot until it exits."""
+        return self._state.pinned()
+
+    @writes_snapshot
+    def _load_and_index(self):
+        # Versions are read first: a change made during the load shows up as stale later.
+        self.data_versions = self._storage_versions()
+        self.students_df, self.internships_df = self._load_and_preprocess_data()
+        self._build_indexes()
+        self._load_or_build_vectors()
+
+    def _storage_versions(self):
+        return {table: self.storage.table_version(table) for table in (STUDENTS, INTERNSHIPS)}
+
+    def _record_data_version(self, table):
+        """
+        Notes the storage version of `table` after this engine wrote it. Only the
+        reloader (internships) and shared state (both tables) compare versions, so
+        student versions, a full read with CSV storage, are skipped otherwise.
+        """
+        if table == INTERNSHIPS or self.shared_state is not None:
+            self.data_versions = {**self.data_versions, table: self.storage.table_version(table)}
+
+    def _reload_stale_tables(self):
+        """Re-reads whatever changed in storage since this engine read or wrote it."""
+        current = self._storage_versions()
+        if current[STUDENTS] != self.data_versions.get(STUDENTS):
+            logging.info("Students changed in storage; reloading the engine.")
+            self._load_and_index()
+        elif current[INTERNSHIPS] != self.data_versions.get(INTERNSHIPS):
+            logging.info("Internships changed in storage; reloading them.")
+            self._reload_internships()
+
+    def _build_indexes(self):
+        self.filter_index = FilterIndex(self.internships_df)
+        self.student_lookup = EntityIndex(self.students_df, "student_id", "name")
+        self.internship_lookup = EntityIndex(self.internships_df, "internship_id")
+
+    def refresh_shared_state(self):
+        """
+        Attaches to the newest generation in `shared_state` if it differs from the
+        one this engine holds. Returns True if the engine now holds a published
+        generation, False if there is nothing to attach to.
+        """
+        if self.shared_state is None:
+            return False
+        generation = self.shared_state.generation()
+        if generation is None:
+            return False
+        if generation == self.shared_generation:
+            return True
+        started = time.perf_counter()
+        with self._state.writing():
+            if generation == self.shared_generation:
+                return True  # another thread attached while this one waited
+            state = self.shared_state.attach(generation)
+            self.students_df = state["students_df"]
+            self.internships_df = state["internships_df"]
+            self.stored_student_columns = state["stored_columns"]["students"]
+            self.stored_internship_columns = state["stored_columns"]["internships"]
+            self._build_indexes()
+            self._set_feature_vectors(
+                state["vectorizer"], state["skill_vectorizer"], state["matrices"], state["skills_vocabulary"]
+            )
+            self.shared_generation = generation
+            self._hold_shared_rows()
+            self.data_versions = state["data_versions"] or {}
+            self.load_report = {
+                "path": "shared",
+                "generation": generation,
+                "reason": "attached to published generation",
+                "seconds": round(time.perf_counter() - started, 4),
+            }
+        logging.info(json.dumps({"event": "engine_vectors", **self.load_report}))
+        return True
+
+    def publish_shared_state(self):
+        """
+        Publishes this engine's data and vectors as the next shared generation, so
+        other workers pick up local changes (e.g. added students) on their next
+        refresh_shared_state(). Returns the generation number, or None if not shared.
+        """
+        if self.shared_state is None:
+            return None
+        # The shared lock is always taken before the snapshot write lock.
+        with self.shared_state.lock(), self._state.writing(), stage_timer("publish"):
+            # A generation must hold what storage holds, so catch up on outside changes first.
+            self._reload_stale_tables()
+            self.shared_generation = self.shared_state.publish(self)
+            self._hold_shared_rows()
+        logging.info(json.dumps({"event": "shared_state_published", "generation": self.shared_generation}))
+        return self.shared_generation
+
+    def _hold_shared_rows(self):
+        """Notes that every row of both tables is as in the shared generation."""
+        self.shared_rows = {STUDENTS: len(self.students_df), INTERNSHIPS: len(self.internships_df)}
+
+    def _rows_rewritten(self, *tables):
+        """
+        Notes that existing rows of `tables` changed, not just gained rows after
+        them, so the next publish cannot append to the shared generation's store.
+        """
+        self.shared_rows = {**(self.shared_rows or {}), **dict.fromkeys(tables, 0)}
+
+    @contextmanager
+    def _shared_write(self, catch_up=True):
+        """
+        A write other workers must see. With shared state it runs under the shared
+        lock on top of the latest published generation, caught up with storage
+        (unless the write re-reads storage itself), and publishes the result, so two
+        workers never hand out the same max+1 ID or miss a reload.
+        """
+        if self.shared_state is None:
+            with self._state.writing():
+                yield
+            return
+        with self.shared_state.lock():
+            with self._state.writing():
+                self.refresh_shared_state()
+                if catch_up:
+                    self._reload_stale_tables()
+                yield
+                self.publish_shared_state()
+
     def _setup_logging(self):
         for handler in logging.root.handlers[:]:
             logging.root.removeHandler(handler)
@@ -37,22 +312,19 @@ class RecommendationEngine:
             [skill.strip().replace(" ", "_") for skill in skills_string.lower().split(",")]
         )
 
-    def _load_and_preprocess_data(self, student_filepath, internship_filepath):
-        students_df = pd.read_csv(student_filepath)
-        internships_df = pd.read_csv(internship_filepath)
+    def _load_and_preprocess_data(self):
+        students_df = self.storage.load_students()
+        internships_df = self.storage.load_internships()
+        self.stored_student_columns = list(students_df.columns)
+        self.stored_internship_columns = list(internships_df.columns)
+        return self._preprocess_students(students_df), self._preprocess_internships(internships_df)
 
+    def _preprocess_students(self, students_df):
         text_cols_student = ["branch", "skills", "location_preference"]
-        text_cols_internship = ["domain", "required_skills", "location", "state"]
-
         for col in text_cols_student:
             students_df[col].fillna("", inplace=True)
-        for col in text_cols_internship:
-            internships_df[col].fillna("", inplace=True)
 
         students_df["normalized_skills"] = students_df["skills"].apply(self._normalize_skills)
-        internships_df["normalized_skills"] = internships_df["required_skills"].apply(
-            self._normalize_skills
-        )
 
         students_df["profile_text"] = (
             students_df["branch"].str.lower()
@@ -61,6 +333,16 @@ class RecommendationEngine:
             + " "
             + students_df["normalized_skills"]
         )
+        return students_df
+
+    def _preprocess_internships(self, internships_df):
+        text_cols_internship = ["domain", "required_skills", "location", "state"]
+        for col in text_cols_internship:
+            internships_df[col].fillna("", inplace=True)
+
+        internships_df["normalized_skills"] = internships_df["required_skills"].apply(
+            self._normalize_skills
+        )
 
         internships_df["profile_text"] = (
             internships_df["domain"].str.lower()
@@ -71,8 +353,70 @@ class RecommendationEngine:
             + " "
             + internships_df["normalized_skills"]
         )
+        return internships_df
+
+    def get_student_index(self, student_id):
+        """Row position of `student_id` in students_df, or None if it is unknown."""
+        return self.student_lookup.get(student_id)
+
+    def get_internship_index(self, internship_id):
+        """Row position of `internship_id` in internships_df, or None if it is unknown."""
+        return self.internship_lookup.get(internship_id)
 
-        return students_df, internships_df
+    def find_students_by_name(self, name):
+        """Row positions of the students whose name matches (case and spacing ignored)."""
+        return self.student_lookup.find_name(name)
+
+    def search_students(self, prefix, limit=10):
+        """Row positions of students whose name starts with `prefix`, in name order."""
+        return self.student_lookup.search_prefix(prefix, limit)
+
+    def _load_or_build_vectors(self):
+        started = time.perf_counter()
+        self.load_report = {"path": "fitted", "fingerprint": None, "reason": "artifacts disabled"}
+        if self.artifact_store is None:
+            self._create_feature_vectors()
+        else:
+            fingerprint = self.storage.fingerprint()
+            if self.vectorizer_mode != "tfidf":
+                fingerprint = f"{fingerprint}-{self.vectorizer_mode}"
+            self.load_report.update(fingerprint=fingerprint, reason="no artifacts for fingerprint")
+            if self.artifact_store.exists(fingerprint):
+                try:
+                    vectorizer, skill_vectorizer, matrices, skills_vocabulary = self.artifact_store.load(
+                        fingerprint
+                    )
+                    if matrices["student_vectors"].shape[0] != len(self.students_df) or matrices[
+                        "internship_vectors"
+                    ].shape[0] != len(self.internships_df):
+                        raise ValueError("row counts do not match the data")
+                    self._set_feature_vectors(vectorizer, skill_vectorizer, matrices, skills_vocabulary)
+                    self.load_report.update(path="loaded", reason="fingerprint matched")
+                except Exception as e:
+                    logging.warning(f"Could not load artifacts {fingerprint}, refitting. Error: {e}")
+                    self.load_report["reason"] = f"load failed: {e}"
+            if self.load_report["path"] != "loaded":
+                self._create_feature_vectors()
+                try:
+                    self.artifact_store.save(
+                        fingerprint,
+                        self.vectorizer,
+                        self.skill_vectorizer,
+                        {name: getattr(self, name) for name in MATRIX_NAMES},
+                        self.skills_vocabulary,
+                    )
+                    self.artifact_store.drop_others(fingerprint)
+                    self.load_report["path"] = "rebuilt"
+                except OSError as e:
+                    logging.warning(f"Could not save artifacts {fingerprint}. Error: {e}")
+
+        self.load_report["seconds"] = round(time.perf_counter() - started, 4)
+        logging.info(json.dumps({"event": "engine_vectors", **self.load_report}))
+
+    def _new_vectorizer(self):
+        if self.vectorizer_mode == "hashing":
+            return OnlineTfidfVectorizer(stop_words="english")
+        return TfidfVectorizer(stop_words="english")
 
     def _create_feature_vectors(self):
         all_profiles_text = pd.concat(
@@ -80,175 +424,742 @@ class RecommendationEngine:
             ignore_index=True,
         )
 
-        self.vectorizer = TfidfVectorizer(stop_words="english")
-        self.vectorizer.fit(all_profiles_text)
-
-        self.student_vectors = self.vectorizer.transform(self.students_df["profile_text"])
-        self.internship_vectors = self.vectorizer.transform(self.internships_df["profile_text"])
+        vectorizer = self._new_vectorizer()
+        vectorizer.fit(all_profiles_text)
 
         all_skills_text = pd.concat(
             [self.students_df["normalized_skills"], self.internships_df["normalized_skills"]],
             ignore_index=True,
         )
 
-        self.skill_vectorizer = TfidfVectorizer(stop_words="english")
-        self.skill_vectorizer.fit(all_skills_text)
+        skill_vectorizer = self._new_vectorizer()
+        skill_vectorizer.fit(all_skills_text)
 
-        self.student_skill_vectors = self.skill_vectorizer.transform(
-            self.students_df["normalized_skills"]
+        matrices = {
+            "student_vectors": vectorizer.transform(self.students_df["profile_text"]),
+            "internship_vectors": vectorizer.transform(self.internships_df["profile_text"]),
+            "student_skill_vectors": skill_vectorizer.transform(self.students_df["normalized_skills"]),
+            "internship_skill_vectors": skill_vectorizer.transform(
+                self.internships_df["normalized_skills"]
+            ),
+        }
+        self._set_feature_vectors(
+            vectorizer, skill_vectorizer, matrices, set(" ".join(all_skills_text).split())
         )
-        self.internship_skill_vectors = self.skill_vectorizer.transform(
-            self.internships_df["normalized_skills"]
+
+    def _set_feature_vectors(self, vectorizer, skill_vectorizer, matrices, skills_vocabulary):
+        self._rows_rewritten(STUDENTS, INTERNSHIPS)
+        self.vectorizer = vectorizer
+        self.skill_vectorizer = skill_vectorizer
+        self.student_vectors = matrices["student_vectors"]
+        self.internship_vectors = matrices["internship_vectors"]
+        self.student_skill_vectors = matrices["student_skill_vectors"]
+        self.internship_skill_vectors = matrices["internship_skill_vectors"]
+        self.ann_index = None
+        if self.retrieval == "ivf":
+            with stage_timer("ann_build"):
+                self.ann_index = IVFIndex(self.internship_vectors, self.ann_lists, self.ann_probe)
+        self.dense = None
+        self.dense_report = None
+        if self.dense_dims:
+            with stage_timer("dense_build"):
+                self.dense = DenseProjection(self.dense_dims, self.dense_quantize).fit(
+                    sp.vstack([self.student_vectors, self.internship_vectors])
+                )
+                self.dense_student_vectors = self.dense.encode(self.student_vectors)
+                self.dense_internship_vectors = self.dense.encode(self.internship_vectors)
+            self.dense_report = self.dense_score_drift()
+            logging.info(json.dumps({"event": "dense_projection", **self.dense_report}))
+        self.skills_vocabulary = skills_vocabulary
+        if self.vectorizer_mode == "hashing":
+            # Bucket -> token name; the vectorizer keeps it current as tokens arrive.
+            self.skill_feature_names = self.skill_vectorizer.bucket_names
+            self._drift = {}
+            return
+        self.skill_feature_names = self.skill_vectorizer.get_feature_names_out()
+
+        self._drift = {
+            "profile": self._new_drift_state(self.vectorizer, self.student_vectors, self.internship_vectors),
+            "skills": self._new_drift_state(
+                self.skill_vectorizer, self.student_skill_vectors, self.internship_skill_vectors
+            ),
+        }
+
+    def _new_drift_state(self, vectorizer, *fitted_vectors):
+        vocab_size = len(vectorizer.vocabulary_)
+        doc_freq = sum(np.bincount(v.indices, minlength=vocab_size) for v in fitted_vectors)
+        return {
+            "fit_docs": sum(v.shape[0] for v in fitted_vectors),
+            "fit_doc_freq": doc_freq,
+            "added_docs": 0,
+            "added_doc_freq": np.zeros(vocab_size, dtype=np.int64),
+            "total_tokens": 0,
+            "oov_tokens": 0,
+        }
+
+    def _track_drift(self, name, vectorizer, texts, new_vectors):
+        state = dict(self._drift[name])
+        analyzer = vectorizer.build_analyzer()
+        for text in texts:
+            tokens = analyzer(text)
+            state["total_tokens"] += len(tokens)
+            state["oov_tokens"] += sum(1 for token in tokens if token not in vectorizer.vocabulary_)
+        state["added_docs"] += new_vectors.shape[0]
+        state["added_doc_freq"] = state["added_doc_freq"] + np.bincount(
+            new_vectors.indices, minlength=len(state["added_doc_freq"])
         )
-        self.skills_vocabulary = set(" ".join(all_skills_text).split())
+        self._drift = {**self._drift, name: state}
 
-    def get_recommendations(self, student_index, top_n=5, state_filter=None, city_filter=None):
-        student_vector = self.student_vectors[student_index]
-        similarity_scores = cosine_similarity(student_vector, self.internship_vectors)
+    def _untrack_drift(self, name, old_vectors):
+        # Rows vectorized with the current vocabulary that are leaving the corpus.
+        state = dict(self._drift[name])
+        state["added_docs"] -= old_vectors.shape[0]
+        state["added_doc_freq"] = state["added_doc_freq"] - np.bincount(
+            old_vectors.indices, minlength=len(state["added_doc_freq"])
+        )
+        self._drift = {**self._drift, name: state}
+
+    @reads_snapshot
+    def vocabulary_drift(self):
+        """
+        Reports how far the fitted vectorizers have drifted since the last fit:
+        `oov_token_ratio` is the share of tokens in added profiles that the vocabulary
+        ignores, and `idf_shift` is the largest relative change the added documents
+        would cause in any term's IDF.
+        """
+        vectorizers = {"profile": self.vectorizer, "skills": self.skill_vectorizer}
+        if self.vectorizer_mode == "hashing":
+            return {
+                name: {"added_docs": v.net_added_docs, "oov_token_ratio": 0.0, "idf_shift": v.idf_drift()}
+                for name, v in vectorizers.items()
+            }
+        report = {}
+        for name, state in self._drift.items():
+            n_docs = state["fit_docs"] + state["added_docs"]
+            doc_freq = state["fit_doc_freq"] + state["added_doc_freq"]
+            current_idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+            fitted_idf = vectorizers[name].idf_
+            report[name] = {
+                "added_docs": state["added_docs"],
+                "oov_token_ratio": state["oov_tokens"] / state["total_tokens"]
+                if state["total_tokens"]
+                else 0.0,
+                "idf_shift": float(np.max(np.abs(current_idf - fitted_idf) / fitted_idf))
+                if len(fitted_idf)
+                else 0.0,
+            }
+        return report
+
+    def _vocabulary_size(self, vectorizer):
+        if self.vectorizer_mode == "hashing":
+            return len(vectorizer.bucket_names)
+        return len(vectorizer.vocabulary_)
+
+    @reads_snapshot
+    def collect_metrics(self):
+        """Gauge samples (name, labels, value) for metrics.MetricsRegistry.register_collector."""
+        samples = [
+            ("engine_rows", {"table": "students"}, len(self.students_df)),
+            ("engine_rows", {"table": "internships"}, len(self.internships_df)),
+            ("engine_index_entries", {"index": "student_lookup"}, len(self.student_lookup)),
+            ("engine_index_entries", {"index": "internship_lookup"}, len(self.internship_lookup)),
+            ("engine_vocabulary_size", {"vectorizer": "profile"}, self._vocabulary_size(self.vectorizer)),
+            ("engine_vocabulary_size", {"vectorizer": "skills"}, self._vocabulary_size(self.skill_vectorizer)),
+            ("engine_refits", {}, self.refit_count),
+            ("engine_snapshot_version", {}, self.snapshot.version),
+            ("engine_artifacts_loaded", {}, int(self.load_report["path"] == "loaded")),
+        ]
+        if self.dense is not None:
+            samples.append(("engine_dense_bytes", {"table": "students"}, self.dense_student_vectors.nbytes))
+            samples.append(("engine_dense_bytes", {"table": "internships"}, self.dense_internship_vectors.nbytes))
+            for key in ("explained_variance", "mean_abs_error", "max_abs_error", "top_n_overlap"):
+                samples.append((f"engine_dense_{key}", {}, self.dense_report[key]))
+        if self.ann_index is not None:
+            samples.append(("engine_ann_lists", {}, self.ann_index.n_lists))
+            samples.append(("engine_ann_probe", {}, self.ann_index.n_probe))
+        filter_stats = self.filter_index.stats()
+        for col, count in filter_stats["values"].items():
+            samples.append(("engine_filter_index_values", {"column": col}, count))
+        samples.append(("engine_filter_index_cached_bitmaps", {}, filter_stats["cached_bitmaps"]))
+        samples.append(("engine_filter_index_bitmap_bytes", {}, filter_stats["bitmap_bytes"]))
+        for name in MATRIX_NAMES:
+            samples.append(("engine_matrix_nnz", {"matrix": name}, getattr(self, name).nnz))
+        for name, drift in self.vocabulary_drift().items():
+            for kind in ("oov_token_ratio", "idf_shift"):
+                samples.append(("engine_vocabulary_drift", {"vectorizer": name, "kind": kind}, drift[kind]))
+        cache = self.suggestion_cache.stats()
+        for key in ("hits", "misses", "evictions", "entries", "hit_rate"):
+            samples.append((f"suggestion_cache_{key}", {}, cache[key]))
+        if hasattr(self.llm_client, "stats"):
+            for key, value in self.llm_client.stats().items():
+                samples.append((f"llm_client_{key}", {}, value))
+        return samples
 
-        sorted_indices = similarity_scores[0].argsort()[::-1]
-        recommended_internships = self.internships_df.iloc[sorted_indices].copy()
-        recommended_internships["match_score"] = similarity_scores[0][sorted_indices]
+    @writes_snapshot
+    def refit(self):
+        """Refits both vectorizers on the current data and rebuilds every vector."""
+        with stage_timer("refit"):
+            self._create_feature_vectors()
+        self.refit_count += 1
+        logging.info(f"Refitted vectorizers (refit #{self.refit_count}).")
+
+    def _fork_online_vectorizers(self):
+        # Copies share the counter arrays; partial_fit/forget then replace, not mutate, them.
+        self.vectorizer = self.vectorizer.copy()
+        self.skill_vectorizer = self.skill_vectorizer.copy()
+        self.skill_feature_names = self.skill_vectorizer.bucket_names
+
+    def _append_student_vectors(self, new_student_df):
+        if self.vectorizer_mode == "hashing":
+            self._fork_online_vectorizers()
+            self.vectorizer.partial_fit(new_student_df["profile_text"])
+            self.skill_vectorizer.partial_fit(new_student_df["normalized_skills"])
+        with stage_timer("vectorize"):
+            new_vectors = self.vectorizer.transform(new_student_df["profile_text"])
+            new_skill_vectors = self.skill_vectorizer.transform(new_student_df["normalized_skills"])
+
+        self.student_vectors = sp.vstack([self.student_vectors, new_vectors], format="csr")
+        self.student_skill_vectors = sp.vstack(
+            [self.student_skill_vectors, new_skill_vectors], format="csr"
+        )
+        self.skills_vocabulary = self.skills_vocabulary | set(" ".join(new_student_df["normalized_skills"]).split())
+        if self.dense is not None:
+            self.dense_student_vectors = self.dense_student_vectors.append(self.dense.encode(new_vectors))
 
+        if self.vectorizer_mode == "tfidf":
+            self._track_drift("profile", self.vectorizer, new_student_df["profile_text"], new_vectors)
+            self._track_drift(
+                "skills", self.skill_vectorizer, new_student_df["normalized_skills"], new_skill_vectors
+            )
+        self._refit_if_drifted()
+
+    def _refit_if_drifted(self):
+        drift = self.vocabulary_drift()
+        worst = max(max(d["oov_token_ratio"], d["idf_shift"]) for d in drift.values())
+        if worst > self.refit_drift_threshold:
+            logging.info(f"Vocabulary drift {worst:.3f} exceeds threshold, refitting.")
+            self.refit()
+
+    def _candidate_indices(self, state_filter=None, city_filter=None, filters=None):
+        """
+        Returns the row positions that pass the filters, or None for no filtering.
+        `filters` is a FilterIndex.resolve dict; the legacy state/city arguments are
+        merged into it ("All India" / "All Cities" mean no filter).
+        """
+        filters = dict(filters or {})
         if state_filter and state_filter != "All India":
-            recommended_internships = recommended_internships[
-                recommended_internships["state"] == state_filter
-            ]
+            filters["state"] = state_filter
         if city_filter and city_filter != "All Cities":
-            recommended_internships = recommended_internships[
-                recommended_internships["location"] == city_filter
-            ]
+            filters["location"] = city_filter
+        with stage_timer("filter"):
+            return self.filter_index.resolve(filters)
 
-        return recommended_internships.head(top_n)
+    def _select_top_k(self, scores, top_n, candidates=None):
+        """
+        Picks the top_n entries of `scores` with a partial selection, best first.
+        `candidates` holds the row position of each score (defaults to 0..n-1).
+        Equal scores are ordered by the higher position first, so ties are deterministic.
+        """
+        if candidates is None:
+            candidates = np.arange(scores.shape[0])
 
-    def get_recommendations_for_new_profile(
-        self, new_profile_data, top_n=5, state_filter=None, city_filter=None
+        if top_n is not None and top_n < len(candidates):
+            kth = np.argpartition(-scores, top_n - 1)[top_n - 1]
+            keep = scores >= scores[kth]
+            candidates, scores = candidates[keep], scores[keep]
+
+        order = np.lexsort((-candidates, -scores))[:top_n]
+        return candidates[order], scores[order]
+
+    def _select_top_k_rows(self, scores, top_n, candidates=None):
+        """
+        Row-wise version of _select_top_k for a (queries x candidates) score block.
+        Returns (positions, scores) arrays of shape (queries, k).
+        """
+        if candidates is None:
+            candidates = np.arange(scores.shape[1])
+        k = len(candidates) if top_n is None else min(top_n, len(candidates))
+        if k == 0:
+            empty = np.empty((scores.shape[0], 0))
+            return empty.astype(candidates.dtype), empty
+
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        part_positions = candidates[part]
+        order = np.lexsort((-part_positions, -part_scores), axis=1)
+        top_positions = np.take_along_axis(part_positions, order, axis=1)
+        top_scores = np.take_along_axis(part_scores, order, axis=1)
+
+        # Rows with ties at the cut-off may have kept an arbitrary tied entry;
+        # re-select those rows exactly so the batch path matches the single path.
+        tied_rows = np.flatnonzero((scores >= top_scores[:, -1:]).sum(axis=1) > k)
+        for row in tied_rows:
+            top_positions[row], top_scores[row] = self._select_top_k(scores[row], k, candidates)
+        return top_positions, top_scores
+
+    def _score_internships(self, query_vectors, candidates=None):
+        """Cosine scores of each query row against the (optionally pre-filtered) internships."""
+        if candidates is not None and len(candidates) == 0:
+            return np.empty((query_vectors.shape[0], 0))
+        with stage_timer("score"):
+            if self.dense is not None:
+                return self.dense_internship_vectors.scores(self.dense.transform(query_vectors), candidates)
+            if candidates is None:
+                return cosine_similarity(query_vectors, self.internship_vectors)
+            return cosine_similarity(query_vectors, self.internship_vectors[candidates])
+
+    @reads_snapshot
+    def score_students(self, internship_index):
+        """Similarity of every student to one internship, in the engine's scoring mode."""
+        internship_vector = self.internship_vectors[internship_index]
+        with stage_timer("score"):
+            if self.dense is not None:
+                return self.dense_student_vectors.scores(self.dense.transform(internship_vector))[0]
+            return cosine_similarity(internship_vector, self.student_vectors)[0]
+
+    @reads_snapshot
+    def dense_score_drift(self, sample=100, top_n=10, chunk_size=10):
+        """
+        Compares dense and exact cosine scores for up to `sample` students spread
+        over the table (see embeddings.score_drift), plus the share of TF-IDF
+        variance the projection keeps. None when the dense mode is off.
+        """
+        if self.dense is None:
+            return None
+        n_students = len(self.students_df)
+        queries = np.unique(np.linspace(0, n_students - 1, min(sample, n_students)).astype(int))
+        weighted = {"mean_abs_error": 0.0, "top_n_overlap": 0.0}
+        max_error = 0.0
+        for start in range(0, len(queries), chunk_size):
+            chunk = self.student_vectors[queries[start : start + chunk_size]]
+            drift = score_drift(
+                cosine_similarity(chunk, self.internship_vectors),
+                self.dense_internship_vectors.scores(self.dense.transform(chunk)),
+                top_n,
+            )
+            for key in weighted:
+                weighted[key] += drift[key] * chunk.shape[0]
+            max_error = max(max_error, drift["max_abs_error"])
+        n = max(1, len(queries))
+        return {
+            "dims": self.dense.svd.n_components,
+            "quantized": bool(self.dense_quantize),
+            "explained_variance": self.dense.explained_variance,
+            "mean_abs_error": weighted["mean_abs_error"] / n,
+            "max_abs_error": max_error,
+            "top_n_overlap": weighted["top_n_overlap"] / n,
+            "sampled_queries": len(queries),
+        }
+
+    def _rank_internships(
+        self, query_vector, top_n, state_filter=None, city_filter=None, filters=None
     ):
-        new_df = pd.DataFrame([new_profile_data])
-        new_df["normalized_skills"] = new_df["skills"].apply(self._normalize_skills)
+        candidates = self._candidate_indices(state_filter, city_filter, filters)
+        if self.ann_index is not None and top_n is not None:
+            with stage_timer("ann_probe"):
+                candidates = self.ann_index.candidates(query_vector, min_results=top_n, allowed=candidates)
+        similarity_scores = self._score_internships(query_vector, candidates)[0]
+
+        with stage_timer("select"):
+            top_indices, top_scores = self._select_top_k(similarity_scores, top_n, candidates)
+        recommended_internships = self.internships_df.iloc[top_indices].copy()
+        recommended_internships["match_score"] = top_scores
+        return recommended_internships
 
-        new_df["profile_text"] = (
-            new_df["branch"].str.lower()
+    def _build_profile_frame(self, profiles):
+        profile_df = pd.DataFrame(profiles)
+        for col in ["branch", "skills", "location_preference"]:
+            profile_df[col] = profile_df[col].fillna("")
+        profile_df["normalized_skills"] = profile_df["skills"].apply(self._normalize_skills)
+
+        profile_df["profile_text"] = (
+            profile_df["branch"].str.lower()
             + " "
-            + new_df["location_preference"].str.lower()
+            + profile_df["location_preference"].str.lower()
             + " "
-            + new_df["normalized_skills"]
+            + profile_df["normalized_skills"]
         )
+        return profile_df
 
-        new_student_vector = self.vectorizer.transform(new_df["profile_text"])
-        similarity_scores = cosine_similarity(new_student_vector, self.internship_vectors)
+    def _build_internship_frame(self, internships):
+        internship_df = pd.DataFrame(internships)
+        for col in ["domain", "required_skills", "location", "state"]:
+            internship_df[col] = internship_df[col].fillna("")
+        internship_df["normalized_skills"] = internship_df["required_skills"].apply(self._normalize_skills)
 
-        sorted_indices = similarity_scores[0].argsort()[::-1]
-        recommended_internships = self.internships_df.iloc[sorted_indices].copy()
-        recommended_internships["match_score"] = similarity_scores[0][sorted_indices]
+        internship_df["profile_text"] = (
+            internship_df["domain"].str.lower()
+            + " "
+            + internship_df["location"].str.lower()
+            + " "
+            + internship_df["state"].str.lower()
+            + " "
+            + internship_df["normalized_skills"]
+        )
+        return internship_df
 
-        if state_filter and state_filter != "All India":
-            recommended_internships = recommended_internships[
-                recommended_internships["state"] == state_filter
-            ]
-        if city_filter and city_filter != "All Cities":
-            recommended_internships = recommended_internships[
-                recommended_internships["location"] == city_filter
-            ]
+    @reads_snapshot
+    def get_recommendations(
+        self, student_index, top_n=5, state_filter=None, city_filter=None, filters=None
+    ):
+        student_vector = self.student_vectors[student_index]
+        return self._rank_internships(student_vector, top_n, state_filter, city_filter, filters)
+
+    @reads_snapshot
+    def get_recommendations_for_new_profile(
+        self, new_profile_data, top_n=5, state_filter=None, city_filter=None, filters=None
+    ):
+        with stage_timer("vectorize"):
+            new_df = self._build_profile_frame([new_profile_data])
+            new_student_vector = self.vectorizer.transform(new_df["profile_text"])
+        return self._rank_internships(
+            new_student_vector, top_n, state_filter, city_filter, filters
+        )
+
+    @reads_snapshot
+    def get_batch_recommendations(
+        self,
+        student_indices=None,
+        profiles=None,
+        top_n=5,
+        state_filter=None,
+        city_filter=None,
+        filters=None,
+        chunk_size=1024,
+    ):
+        """
+        Recommends internships for many students at once. Pass either `student_indices`
+        (row positions in students_df) or `profiles` (dicts with branch, skills and
+        location_preference). Scores are computed `chunk_size` queries at a time, so
+        peak memory stays at one chunk_size x internships score block.
 
-        return recommended_internships.head(top_n)
+        Returns one long-format frame: the internship columns plus `query_position`
+        (position in the input list), `rank` (0 = best) and `match_score`.
+        """
+        if student_indices is not None:
+            query_vectors = self.student_vectors[np.asarray(student_indices, dtype=int)]
+        elif profiles is not None:
+            with stage_timer("vectorize"):
+                query_vectors = self.vectorizer.transform(
+                    self._build_profile_frame(profiles)["profile_text"]
+                )
+        else:
+            raise ValueError("Either student_indices or profiles must be provided.")
+
+        candidates = self._candidate_indices(state_filter, city_filter, filters)
+        positions, scores, query_positions = [], [], []
+        chunk_size = max(1, int(chunk_size))
+        for start in range(0, query_vectors.shape[0], chunk_size):
+            chunk = query_vectors[start : start + chunk_size]
+            chunk_scores = self._score_internships(chunk, candidates)
+            with stage_timer("select"):
+                chunk_positions, chunk_scores = self._select_top_k_rows(chunk_scores, top_n, candidates)
+            positions.append(chunk_positions.ravel())
+            scores.append(chunk_scores.ravel())
+            query_positions.append(
+                np.repeat(np.arange(start, start + chunk.shape[0]), chunk_positions.shape[1])
+            )
+
+        if not positions:
+            result = self.internships_df.iloc[[]].copy()
+            result["query_position"], result["rank"], result["match_score"] = [], [], []
+            return result
+
+        positions = np.concatenate(positions)
+        query_positions = np.concatenate(query_positions)
+        result = self.internships_df.iloc[positions].reset_index(drop=True)
+        result.insert(0, "query_position", query_positions)
+        result.insert(1, "rank", np.arange(len(result)) - np.searchsorted(query_positions, query_positions))
+        result["match_score"] = np.concatenate(scores)
+        return result
 
     def add_new_student(self, new_profile_data):
+        new_ids = self.add_new_students([new_profile_data])
+        return None if new_ids is None else new_ids[0]
+
+    def add_new_students(self, profiles):
+        """
+        Adds several student profiles as one write: a single concat, vector append,
+        storage append and snapshot swap for the whole batch. Returns the new IDs in
+        input order, or None if the batch failed (then nothing is added).
+        """
+        if not profiles:
+            return []
         try:
-            new_id = self.students_df["student_id"].max() + 1
-            new_profile_data["student_id"] = new_id
+            with self._shared_write():
+                first_id = self.students_df["student_id"].max() + 1
+                new_ids = [first_id + offset for offset in range(len(profiles))]
+                for profile, new_id in zip(profiles, new_ids):
+                    profile["student_id"] = new_id
 
-            new_student_df = pd.DataFrame([new_profile_data])
-            new_student_df["normalized_skills"] = new_student_df["skills"].apply(
-                self._normalize_skills
-            )
-            new_student_df["profile_text"] = (
-                new_student_df["branch"].str.lower()
-                + " "
-                + new_student_df["location_preference"].str.lower()
-                + " "
-                + new_student_df["normalized_skills"]
-            )
+                new_student_df = self._build_profile_frame(profiles)
 
-            self.students_df = pd.concat([self.students_df, new_student_df], ignore_index=True)
-            self.students_df.to_csv("students.csv", index=False)
+                new_position = len(self.students_df)
+                self.students_df = pd.concat([self.students_df, new_student_df], ignore_index=True)
+                student_lookup = self.student_lookup.copy()
+                student_lookup.add(new_student_df, start_position=new_position)
+                self.student_lookup = student_lookup
 
-            self._create_feature_vectors()
-            logging.info(f"Successfully added new student with ID: {new_id}")
+                if self.incremental:
+                    self._append_student_vectors(new_student_df)
+                else:
+                    self._create_feature_vectors()
+                self.storage.append_students(new_student_df.reindex(columns=self.stored_student_columns))
+                self._record_data_version(STUDENTS)
+            logging.info(f"Successfully added {len(new_ids)} new student(s) with IDs: {new_ids}")
+            return new_ids
+        except Exception as e:
+            logging.error(f"Failed to add new students. Error: {e}")
+            return None
+
+    def _refresh_internship_indexes(self):
+        self.filter_index = FilterIndex(self.internships_df)
+        self.internship_lookup = EntityIndex(self.internships_df, "internship_id")
+        if self.ann_index is not None:
+            ann_index = copy.copy(self.ann_index)  # assign() rebinds the lists; centroids are shared
+            ann_index.assign(self.internship_vectors)
+            self.ann_index = ann_index
+
+    def add_internship(self, internship_data):
+        """
+        Adds a posting to storage and to every internship-side structure (vectors,
+        filter and ID indexes, ANN lists) without refitting; returns the new ID or None.
+        """
+        try:
+            with self._shared_write():
+                new_id = self.internships_df["internship_id"].max() + 1
+                internship_data["internship_id"] = new_id
+                new_df = self._build_internship_frame([internship_data])
+
+                if self.vectorizer_mode == "hashing":
+                    self._fork_online_vectorizers()
+                    self.vectorizer.partial_fit(new_df["profile_text"])
+                    self.skill_vectorizer.partial_fit(new_df["normalized_skills"])
+                with stage_timer("vectorize"):
+                    new_vectors = self.vectorizer.transform(new_df["profile_text"])
+                    new_skill_vectors = self.skill_vectorizer.transform(new_df["normalized_skills"])
+
+                self.internships_df = pd.concat([self.internships_df, new_df], ignore_index=True)
+                self.internship_vectors = sp.vstack([self.internship_vectors, new_vectors], format="csr")
+                self.internship_skill_vectors = sp.vstack(
+                    [self.internship_skill_vectors, new_skill_vectors], format="csr"
+                )
+                self.skills_vocabulary = self.skills_vocabulary | set(" ".join(new_df["normalized_skills"]).split())
+                if self.dense is not None:
+                    self.dense_internship_vectors = self.dense_internship_vectors.append(self.dense.encode(new_vectors))
+                self._refresh_internship_indexes()
+
+                if self.vectorizer_mode == "tfidf":
+                    self._track_drift("profile", self.vectorizer, new_df["profile_text"], new_vectors)
+                    self._track_drift("skills", self.skill_vectorizer, new_df["normalized_skills"], new_skill_vectors)
+                self._refit_if_drifted()
+                self.storage.append_internships(new_df.reindex(columns=self.stored_internship_columns))
+                self._record_data_version(INTERNSHIPS)
+            logging.info(f"Successfully added new internship with ID: {new_id}")
             return new_id
         except Exception as e:
-            logging.error(f"Failed to add new student. Error: {e}")
+            logging.error(f"Failed to add new internship. Error: {e}")
             return None
 
-    def get_skill_gap_analysis(self, student_index, internship_index):
-        student_vector = self.student_skill_vectors[student_index].toarray().flatten()
-        internship_vector = self.internship_skill_vectors[internship_index].toarray().flatten()
+    def reload_internships(self):
+        """
+        Re-reads the internship table from storage and rebuilds the internship side
+        (vectors, filter and ID indexes, ANN lists, dense rows) with the fitted
+        vectorizers, leaving students untouched; a refit follows only if the new
+        postings push the vocabulary drift past the threshold. Readers switch to the
+        result in one swap, and with shared state it is published for the other
+        workers. Returns the number of internships loaded.
+        """
+        with self._shared_write(catch_up=False):
+            return self._reload_internships()
 
-        required_skill_indices = np.where(internship_vector > 0)[0]
-        match_indices = np.where((internship_vector > 0) & (student_vector > 0))[0]
-        gap_indices = np.where((internship_vector > 0) & (student_vector == 0))[0]
+    def _reload_internships(self):
+        with stage_timer("reload_internships"):
+            self.data_versions = {**self.data_versions, INTERNSHIPS: self.storage.table_version(INTERNSHIPS)}
+            stored_df = self.storage.load_internships()
+            stored_columns = list(stored_df.columns)
+            internships_df = self._preprocess_internships(stored_df)
+            old_df = self.internships_df
+            old_vectors, old_skill_vectors = self.internship_vectors, self.internship_skill_vectors
 
-        if len(required_skill_indices) == 0:
-            match_percentage = 100
-        else:
-            match_percentage = (len(match_indices) / len(required_skill_indices)) * 100
+            if self.vectorizer_mode == "hashing":
+                self._fork_online_vectorizers()
+                self.vectorizer.forget(old_df["profile_text"])
+                self.skill_vectorizer.forget(old_df["normalized_skills"])
+                self.vectorizer.partial_fit(internships_df["profile_text"])
+                self.skill_vectorizer.partial_fit(internships_df["normalized_skills"])
+            with stage_timer("vectorize"):
+                new_vectors = self.vectorizer.transform(internships_df["profile_text"])
+                new_skill_vectors = self.skill_vectorizer.transform(internships_df["normalized_skills"])
 
-        all_skills = self.skill_vectorizer.get_feature_names_out()
-        missing_skills = [all_skills[i] for i in gap_indices]
-        matching_skills = [all_skills[i] for i in match_indices]
+            self.internships_df = internships_df
+            self._rows_rewritten(INTERNSHIPS)
+            self.internship_vectors = new_vectors
+            self.internship_skill_vectors = new_skill_vectors
+            self.skills_vocabulary = set(
+                " ".join(pd.concat([self.students_df["normalized_skills"], internships_df["normalized_skills"]])).split()
+            )
+            if self.dense is not None:
+                self.dense_internship_vectors = self.dense.encode(new_vectors)
+            self._refresh_internship_indexes()
 
-        learning_paths = {
-            skill.replace("_", " ").capitalize(): f"https://www.youtube.com/results?search_query={urllib.parse.quote(f'{skill.replace("_", " ")} course')}"
-            for skill in missing_skills
-        }
+            if self.vectorizer_mode == "tfidf":
+                # Only rows that left or arrived count; unchanged postings are not re-tracked.
+                gone = ~self._row_keys(old_df).isin(self._row_keys(internships_df)).to_numpy()
+                arrived = ~self._row_keys(internships_df).isin(self._row_keys(old_df)).to_numpy()
+                self._untrack_drift("profile", old_vectors[gone])
+                self._untrack_drift("skills", old_skill_vectors[gone])
+                self._track_drift("profile", self.vectorizer, internships_df["profile_text"][arrived], new_vectors[arrived])
+                self._track_drift(
+                    "skills", self.skill_vectorizer, internships_df["normalized_skills"][arrived], new_skill_vectors[arrived]
+                )
+            self._refit_if_drifted()
+            self.stored_internship_columns = stored_columns
+        logging.info(f"Reloaded {len(internships_df)} internships from storage.")
+        return len(internships_df)
 
-        return {
-            "match_percentage": match_percentage,
-            "matching_skills": [s.replace("_", " ") for s in matching_skills],
-            "missing_skills": [s.replace("_", " ") for s in missing_skills],
-            "learning_paths": learning_paths,
-        }
+    @staticmethod
+    def _row_keys(internships_df):
+        return internships_df["internship_id"].astype(str) + "\0" + internships_df["profile_text"] + "\0" + internships_df[
+            "normalized_skills"
+        ]
 
-    def get_skill_gap_for_new_profile(self, new_profile_data, internship_index):
-        new_df = pd.DataFrame([new_profile_data])
-        new_df["normalized_skills"] = new_df["skills"].apply(self._normalize_skills)
+    @writes_snapshot
+    def remove_student(self, student_id):
+        """Deletes a student from storage and the engine; returns False if the ID is unknown."""
+        position = self.get_student_index(student_id)
+        if position is None:
+            return False
+        row = self.students_df.iloc[[position]]
+        if self.vectorizer_mode == "hashing":
+            self._fork_online_vectorizers()
+            self.vectorizer.forget(row["profile_text"])
+            self.skill_vectorizer.forget(row["normalized_skills"])
+        else:
+            self._untrack_drift("profile", self.student_vectors[[position]])
+            self._untrack_drift("skills", self.student_skill_vectors[[position]])
 
-        student_vector = self.skill_vectorizer.transform(new_df["normalized_skills"]).toarray().flatten()
-        internship_vector = self.internship_skill_vectors[internship_index].toarray().flatten()
+        keep = np.ones(len(self.students_df), dtype=bool)
+        keep[position] = False
+        self.students_df = self.students_df[keep].reset_index(drop=True)
+        self._rows_rewritten(STUDENTS)
+        self.student_vectors = self.student_vectors[keep]
+        self.student_skill_vectors = self.student_skill_vectors[keep]
+        if self.dense is not None:
+            self.dense_student_vectors = self.dense_student_vectors.select(keep)
+        self.student_lookup = EntityIndex(self.students_df, "student_id", "name")
+        self.storage.delete_student(student_id)
+        self._record_data_version(STUDENTS)
+        logging.info(f"Removed student with ID: {student_id}")
+        return True
+
+    @writes_snapshot
+    def remove_internship(self, internship_id):
+        """Deletes a posting from storage and the engine; returns False if the ID is unknown."""
+        position = self.get_internship_index(internship_id)
+        if position is None:
+            return False
+        row = self.internships_df.iloc[[position]]
+        if self.vectorizer_mode == "hashing":
+            self._fork_online_vectorizers()
+            self.vectorizer.forget(row["profile_text"])
+            self.skill_vectorizer.forget(row["normalized_skills"])
+        else:
+            self._untrack_drift("profile", self.internship_vectors[[position]])
+            self._untrack_drift("skills", self.internship_skill_vectors[[position]])
 
-        required_skill_indices = np.where(internship_vector > 0)[0]
-        match_indices = np.where((internship_vector > 0) & (student_vector > 0))[0]
-        gap_indices = np.where((internship_vector > 0) & (student_vector == 0))[0]
+        keep = np.ones(len(self.internships_df), dtype=bool)
+        keep[position] = False
+        self.internships_df = self.internships_df[keep].reset_index(drop=True)
+        self._rows_rewritten(INTERNSHIPS)
+        self.internship_vectors = self.internship_vectors[keep]
+        self.internship_skill_vectors = self.internship_skill_vectors[keep]
+        if self.dense is not None:
+            self.dense_internship_vectors = self.dense_internship_vectors.select(keep)
+        self._refresh_internship_indexes()
+        self.storage.delete_internship(internship_id)
+        self._record_data_version(INTERNSHIPS)
+        logging.info(f"Removed internship with ID: {internship_id}")
+        return True
 
-        if len(required_skill_indices) == 0:
+    def _row_terms(self, matrix, row):
+        """Sorted vocabulary indices of the non-zero entries in one CSR row."""
+        return matrix.indices[matrix.indptr[row] : matrix.indptr[row + 1]]
+
+    def _student_skill_terms(self, student_index=None, new_profile_data=None):
+        if student_index is not None:
+            return np.sort(self._row_terms(self.student_skill_vectors, student_index))
+        new_df = self._build_profile_frame([new_profile_data])
+        student_vector = self.skill_vectorizer.transform(new_df["normalized_skills"])
+        return np.sort(student_vector.indices)
+
+    def _format_skill_gap(self, required_count, match_indices, gap_indices, search_suffix):
+        if required_count == 0:
             match_percentage = 100
         else:
-            match_percentage = (len(match_indices) / len(required_skill_indices)) * 100
+            match_percentage = (len(match_indices) / required_count) * 100
 
-        all_skills = self.skill_vectorizer.get_feature_names_out()
-        missing_skills = [all_skills[i] for i in gap_indices]
-        matching_skills = [all_skills[i] for i in match_indices]
+        missing_skills = [self.skill_feature_names[i].replace("_", " ") for i in gap_indices]
+        matching_skills = [self.skill_feature_names[i].replace("_", " ") for i in match_indices]
 
         learning_paths = {
-            skill.replace("_", " ").capitalize(): f"https://www.youtube.com/results?search_query={urllib.parse.quote(f'{skill.replace("_", " ")} tutorial')}"
+            skill.capitalize(): "https://www.youtube.com/results?search_query="
+            + urllib.parse.quote(f"{skill} {search_suffix}")
             for skill in missing_skills
         }
 
         return {
             "match_percentage": match_percentage,
-            "matching_skills": [s.replace("_", " ") for s in matching_skills],
-            "missing_skills": [s.replace("_", " ") for s in missing_skills],
+            "matching_skills": matching_skills,
+            "missing_skills": missing_skills,
             "learning_paths": learning_paths,
         }
 
+    def _skill_gap(self, student_terms, internship_index, search_suffix):
+        required = np.sort(self._row_terms(self.internship_skill_vectors, internship_index))
+        match_indices = np.intersect1d(required, student_terms, assume_unique=True)
+        gap_indices = np.setdiff1d(required, student_terms, assume_unique=True)
+        return self._format_skill_gap(len(required), match_indices, gap_indices, search_suffix)
+
+    @reads_snapshot
+    def get_skill_gap_analysis(self, student_index, internship_index):
+        student_terms = self._student_skill_terms(student_index=student_index)
+        return self._skill_gap(student_terms, internship_index, "course")
+
+    @reads_snapshot
+    def get_skill_gap_for_new_profile(self, new_profile_data, internship_index):
+        student_terms = self._student_skill_terms(new_profile_data=new_profile_data)
+        return self._skill_gap(student_terms, internship_index, "tutorial")
+
+    @reads_snapshot
+    def get_skill_gap_batch(self, internship_indices, student_index=None, new_profile_data=None):
+        """
+        Skill gap analyses for one student against several internships (e.g. every
+        recommendation card), in the order of `internship_indices`. The required-skill
+        rows are gathered once and matched with a single membership test.
+        """
+        student_terms = self._student_skill_terms(student_index, new_profile_data)
+        search_suffix = "course" if student_index is not None else "tutorial"
+
+        required = self.internship_skill_vectors[np.asarray(internship_indices, dtype=int)]
+        required.sort_indices()
+        is_match = np.isin(required.indices, student_terms)  # indices repeat across rows
+
+        gaps = []
+        for row in range(required.shape[0]):
+            start, end = required.indptr[row], required.indptr[row + 1]
+            terms, matched = required.indices[start:end], is_match[start:end]
+            gaps.append(
+                self._format_skill_gap(int(end - start), terms[matched], terms[~matched], search_suffix)
+            )
+        return gaps
+
+    @reads_snapshot
     def get_resume_suggestions(
         self, api_key, internship_index, student_index=None, new_profile_data=None
     ):
         log_data = {"action": "get_resume_suggestions"}
         try:
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel("gemini-1.5-flash-latest")
-
             if student_index is not None:
                 student_skills = self.students_df.iloc[student_index]["skills"]
                 log_data["student_index"] = int(student_index)
@@ -259,17 +1170,17 @@ class RecommendationEngine:
             internship_skills = self.internships_df.iloc[internship_index]["required_skills"]
             log_data["internship_index"] = int(internship_index)
 
-            prompt = (
-                f'As a career coach, a student with skills: "{student_skills}" '
-                f'is applying for an internship needing: "{internship_skills}". '
-                "Generate 3 concise, professional resume bullet points. "
-                "Each must start with an action verb and highlight the student's relevant skills. "
-                "Do not invent skills."
-            )
+            cache_key = suggestion_cache_key(student_skills, internship_skills)
+            cached = self.suggestion_cache.get(cache_key)
+            if cached is not None:
+                logging.info(json.dumps({**log_data, "success": True, "cache": "hit"}))
+                return cached
 
-            response = model.generate_content(prompt)
-            logging.info(json.dumps({**log_data, "success": True}))
-            return response.text
+            prompt = build_suggestion_prompt(student_skills, internship_skills)
+            suggestions = self.llm_client.generate(api_key, prompt)
+            self.suggestion_cache.put(cache_key, suggestions)
+            logging.info(json.dumps({**log_data, "success": True, "cache": "miss"}))
+            return suggestions
         except Exception as e:
             logging.error(json.dumps({**log_data, "success": False, "error": str(e)}))
             return f"Could not generate resume suggestions: {e}"
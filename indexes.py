@@ -0,0 +1,179 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """
+    Load-time filter index over the internship catalogue. Categorical columns are
+    stored as integer codes with one packed row bitmap per value, and stipend as a
+    sorted array for range queries, so combined filters resolve by bitmap
+    intersection instead of string comparisons over the whole DataFrame.
+    """
+
+    CATEGORICAL_COLUMNS = ["state", "location", "domain", "company", "duration"]
+
+    def __init__(self, internships_df):
+        self.n_rows = len(internships_df)
+        self.codes = {}
+        self.categories = {}
+        self._postings = {}
+        self._bitmaps = {}
+
+        for col in self.CATEGORICAL_COLUMNS:
+            codes, categories = pd.factorize(internships_df[col].fillna("").astype(str), sort=True)
+            self.codes[col] = codes.astype(np.int32)
+            self.categories[col] = {value: code for code, value in enumerate(categories)}
+            # Row positions grouped by code, CSR-style: rows of code c are
+            # order[offsets[c]:offsets[c + 1]].
+            order = np.argsort(codes, kind="stable")
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(categories)))])
+            self._postings[col] = (order, offsets)
+
+        stipend = pd.to_numeric(internships_df["stipend"], errors="coerce").to_numpy(dtype=float)
+        self.stipend_order = np.argsort(stipend, kind="stable")
+        self.stipend_sorted = stipend[self.stipend_order]
+        self._stipend_known = int(np.count_nonzero(~np.isnan(stipend)))
+
+    def _rows_to_bitmap(self, rows):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def _value_bitmap(self, col, value):
+        code = self.categories[col].get(value)
+        if code is None:
+            return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        key = (col, code)
+        if key not in self._bitmaps:
+            order, offsets = self._postings[col]
+            self._bitmaps[key] = self._rows_to_bitmap(order[offsets[code] : offsets[code + 1]])
+        return self._bitmaps[key]
+
+    def _stipend_bitmap(self, min_stipend=None, max_stipend=None):
+        known = self.stipend_sorted[: self._stipend_known]
+        lo = 0 if min_stipend is None else np.searchsorted(known, float(min_stipend), side="left")
+        hi = len(known) if max_stipend is None else np.searchsorted(known, float(max_stipend), side="right")
+        return self._rows_to_bitmap(self.stipend_order[lo:hi])
+
+    def resolve(self, filters):
+        """
+        Resolves a filter dict to sorted row positions, or None when nothing filters.
+        Keys are the categorical column names, each mapped to a value or a list of
+        values (OR-ed), plus `min_stipend` / `max_stipend`. Keys are AND-ed together.
+        """
+        bitmap = None
+        for col, wanted in (filters or {}).items():
+            if wanted is None or col in ("min_stipend", "max_stipend"):
+                continue
+            if col not in self.codes:
+                raise ValueError(f"Unknown filter column: {col}")
+            values = [wanted] if isinstance(wanted, str) else list(wanted)
+            col_bitmap = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for value in values:
+                col_bitmap |= self._value_bitmap(col, value)
+            bitmap = col_bitmap if bitmap is None else bitmap & col_bitmap
+
+        min_stipend = (filters or {}).get("min_stipend")
+        max_stipend = (filters or {}).get("max_stipend")
+        if min_stipend is not None or max_stipend is not None:
+            stipend_bitmap = self._stipend_bitmap(min_stipend, max_stipend)
+            bitmap = stipend_bitmap if bitmap is None else bitmap & stipend_bitmap
+
+        if bitmap is None:
+            return None
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def stats(self):
+        """Sizes of the index: distinct values per column and the cached bitmaps."""
+        return {
+            "rows": self.n_rows,
+            "values": {col: len(categories) for col, categories in self.categories.items()},
+            "cached_bitmaps": len(self._bitmaps),
+            "bitmap_bytes": sum(bitmap.nbytes for bitmap in self._bitmaps.values()),
+        }
+
+    def stipend_range(self):
+        """(min, max) of the known stipends, or None when no stipend is known."""
+        if not self._stipend_known:
+            return None
+        return float(self.stipend_sorted[0]), float(self.stipend_sorted[self._stipend_known - 1])
+
+    def values(self, col, **where):
+        """Sorted distinct values of `col`, optionally restricted to rows matching `where`."""
+        rows = self.resolve(where)
+        if rows is None:
+            return list(self.categories[col])
+        names = list(self.categories[col])
+        return [names[code] for code in np.unique(self.codes[col][rows])]
+
+
+class EntityIndex:
+    """
+    Hash index from an entity ID (and optionally a name) to row position, with
+    prefix search over normalized names for pickers and autocomplete.
+    """
+
+    def __init__(self, df, id_column, name_column=None):
+        self.id_column = id_column
+        self.name_column = name_column
+        self._positions = {}
+        self._names = {}
+        self._sorted_names = []
+        self.add(df, start_position=0)
+
+    @staticmethod
+    def normalize_name(name):
+        return " ".join(str(name).lower().split())
+
+    def __len__(self):
+        return len(self._positions)
+
+    def copy(self):
+        """An independent index to add() to while readers keep using this one."""
+        other = EntityIndex.__new__(EntityIndex)
+        other.id_column = self.id_column
+        other.name_column = self.name_column
+        other._positions = dict(self._positions)
+        other._names = dict(self._names)
+        other._sorted_names = list(self._sorted_names)
+        return other
+
+    def add(self, df, start_position):
+        """Indexes the rows of `df`, which sit at positions start_position.. in the table."""
+        for offset, entity_id in enumerate(df[self.id_column].tolist()):
+            self._positions[entity_id] = start_position + offset
+        if self.name_column is None:
+            return
+        new_names = set()
+        for offset, name in enumerate(df[self.name_column].tolist()):
+            key = self.normalize_name(name)
+            if key not in self._names:
+                new_names.add(key)
+            # A new list rather than append(), so copies never share a position list.
+            self._names[key] = self._names.get(key, []) + [start_position + offset]
+        if len(new_names) > 1:
+            self._sorted_names = sorted(set(self._sorted_names) | new_names)
+        else:
+            for key in new_names:
+                bisect.insort(self._sorted_names, key)
+
+    def get(self, entity_id):
+        """Row position of `entity_id`, or None if it is unknown."""
+        return self._positions.get(entity_id)
+
+    def find_name(self, name):
+        """Row positions whose normalized name equals `name`."""
+        return list(self._names.get(self.normalize_name(name), []))
+
+    def search_prefix(self, prefix, limit=10):
+        """Row positions of names starting with `prefix`, in name order."""
+        key = self.normalize_name(prefix)
+        start = bisect.bisect_left(self._sorted_names, key)
+        positions = []
+        for name in self._sorted_names[start:]:
+            if not name.startswith(key) or len(positions) >= limit:
+                break
+            positions.extend(self._names[name][: limit - len(positions)])
+        return positions
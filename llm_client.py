@@ -0,0 +1,298 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import google.generativeai as genai
+
+MODEL_NAME = "gemini-1.5-flash-latest"
+# Bump whenever the suggestion prompt changes so cached answers are not reused.
+PROMPT_VERSION = "resume-suggestions-v1"
+
+
+def canonical_skills(skills_string):
+    """Comma-separated skills, de-duplicated case-insensitively and sorted."""
+    if not isinstance(skills_string, str):
+        return ""
+    unique = {}
+    for skill in skills_string.split(","):
+        skill = " ".join(skill.split())
+        if skill:
+            unique.setdefault(skill.lower(), skill)
+    return ", ".join(unique[key] for key in sorted(unique))
+
+
+def build_suggestion_prompt(student_skills, internship_skills):
+    return (
+        f'As a career coach, a student with skills: "{canonical_skills(student_skills)}" '
+        f'is applying for an internship needing: "{canonical_skills(internship_skills)}". '
+        "Generate 3 concise, professional resume bullet points. "
+        "Each must start with an action verb and highlight the student's relevant skills. "
+        "Do not invent skills."
+    )
+
+
+def suggestion_cache_key(student_skills, internship_skills, prompt_version=PROMPT_VERSION):
+    normalized = "\n".join(
+        [prompt_version, canonical_skills(student_skills).lower(), canonical_skills(internship_skills).lower()]
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _gemini_model_factory(api_key, model_name):
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+class GeminiModelClient:
+    """
+    Keeps one configured model per API key instead of configuring and building a
+    GenerativeModel on every call. `model_factory(api_key, model_name)` can be
+    replaced with a local fake that returns an object with
+    generate_content(prompt, **kwargs).
+    """
+
+    def __init__(self, model_name=MODEL_NAME, model_factory=_gemini_model_factory):
+        self.model_name = model_name
+        self.model_factory = model_factory
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, api_key):
+        with self._lock:
+            if api_key not in self._models:
+                self._models[api_key] = self.model_factory(api_key, self.model_name)
+            return self._models[api_key]
+
+    def generate(self, api_key, prompt, timeout=None):
+        model = self._model(api_key)
+        if timeout is None:
+            return model.generate_content(prompt).text
+        return model.generate_content(prompt, request_options={"timeout": timeout}).text
+
+
+class HttpModelClient:
+    """
+    Minimal JSON-over-HTTP model client: POSTs {"prompt": ...} to `url` and reads
+    {"text": ...} back. Lets the bounded client be exercised against a local stub
+    server instead of Gemini.
+    """
+
+    def __init__(self, url):
+        self.url = url
+
+    def generate(self, api_key, prompt, timeout=None):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"prompt": prompt}).encode("utf-8"),
+            headers={"Content-Type": "application/json", "X-API-KEY": api_key or ""},
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))["text"]
+
+
+class LLMClientError(Exception):
+    pass
+
+
+class LLMTimeoutError(LLMClientError):
+    pass
+
+
+class LLMOverloadedError(LLMClientError):
+    pass
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Takes one token, waiting up to `timeout` seconds; returns False if none came."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one in-flight future."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.coalesced = 0
+
+    def do(self, key, start):
+        """Returns the in-flight future for `key`, or the one `start()` creates."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = start()
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+class BoundedLLMClient:
+    """
+    Runs model calls on a bounded worker pool behind a token-bucket rate limiter.
+    Every call has a deadline, concurrent identical prompts share one upstream
+    call, and requests beyond `max_pending` are rejected immediately instead of
+    queueing behind a saturated quota.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        max_workers=4,
+        rate_per_second=1.0,
+        burst=5,
+        timeout=30.0,
+        max_pending=64,
+    ):
+        self.client = client or GeminiModelClient()
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._flights = SingleFlight()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def _call(self, api_key, prompt, deadline):
+        try:
+            if not self._bucket.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise LLMTimeoutError("Rate limit wait exceeded the call deadline.")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError("Call deadline passed before the request was sent.")
+            return self.client.generate(api_key, prompt, timeout=remaining)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+
+    def _start(self, api_key, prompt, deadline):
+        with self._pending_lock:
+            if self.max_pending and self._pending >= self.max_pending:
+                raise LLMOverloadedError("Too many suggestion requests in flight; try again shortly.")
+            self._pending += 1
+        return self._pool.submit(self._call, api_key, prompt, deadline)
+
+    def submit(self, api_key, prompt, timeout=None):
+        """Starts (or joins) a call and returns its future."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        key = hashlib.sha256(f"{api_key}\n{prompt}".encode("utf-8")).hexdigest()
+        return self._flights.do(key, lambda: self._start(api_key, prompt, deadline))
+
+    def generate(self, api_key, prompt, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(api_key, prompt, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise LLMTimeoutError(f"No response from the model within {timeout} seconds.")
+
+    def stats(self):
+        with self._pending_lock:
+            pending = self._pending
+        return {"pending": pending, "coalesced": self._flights.coalesced}
+
+
+class SuggestionCache:
+    """
+    Persistent SQLite cache of generated suggestions with a TTL and a maximum
+    number of entries (least recently used entries are evicted first).
+    """
+
+    def __init__(self, path=".suggestion_cache.sqlite", ttl_seconds=7 * 24 * 3600, max_entries=10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS suggestions ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS suggestions_lru ON suggestions (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM suggestions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE suggestions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO suggestions (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()
+            if self.max_entries and count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM suggestions WHERE key IN "
+                    "(SELECT key FROM suggestions ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM suggestions").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": size,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
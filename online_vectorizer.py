@@ -0,0 +1,147 @@
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+class OnlineTfidfVectorizer:
+    """
+    TF-IDF over hashed features with running document-frequency counters. There
+    is no fitted vocabulary: tokens hash to one of `n_features` buckets, so adding
+    (partial_fit) or removing (forget) documents only touches the counters of their
+    own tokens. transform() weights with the IDF of the current counters, using the
+    same smoothed formula as TfidfVectorizer. `bucket_names` maps each seen bucket
+    back to the first token that hashed to it, for display.
+
+    The counters are a base array that is never written after it is built, plus a
+    small sorted delta of the changes since; updates replace the delta, and fold it
+    into a new base once it holds more than `delta_limit` buckets. copy() therefore
+    shares the arrays and costs O(1), not O(n_features). The name map and token set
+    only ever grow, with the first name per bucket kept, so copies share them too.
+    """
+
+    def __init__(self, n_features=2**20, stop_words="english", delta_limit=4096):
+        self.n_features = n_features
+        self.stop_words = stop_words
+        self.delta_limit = delta_limit
+        self._hasher = HashingVectorizer(
+            n_features=n_features, stop_words=stop_words, alternate_sign=False, norm=None
+        )
+        self.bucket_names = {}
+        self._known_tokens = set()
+        self._reset()
+
+    def _reset(self):
+        self._base_doc_freq = np.zeros(self.n_features, dtype=np.int64)
+        self._delta_buckets = np.empty(0, dtype=np.int64)
+        self._delta_counts = np.empty(0, dtype=np.int64)
+        self.n_docs = 0
+        self._fit_doc_freq = self._base_doc_freq
+        self._fit_n_docs = 0
+        self._fit_buckets = np.empty(0, dtype=np.int64)
+
+    def copy(self):
+        """A copy whose counters can be updated without touching this one."""
+        other = OnlineTfidfVectorizer.__new__(OnlineTfidfVectorizer)
+        other.__dict__.update(self.__dict__)
+        return other
+
+    @property
+    def doc_freq(self):
+        """The full document-frequency array (materialized; O(n_features))."""
+        doc_freq = self._base_doc_freq.copy()
+        doc_freq[self._delta_buckets] += self._delta_counts
+        return doc_freq
+
+    def _doc_freq_at(self, buckets):
+        doc_freq = self._base_doc_freq[buckets]
+        if len(self._delta_buckets) == 0:
+            return doc_freq
+        positions = np.minimum(np.searchsorted(self._delta_buckets, buckets), len(self._delta_buckets) - 1)
+        found = self._delta_buckets[positions] == buckets
+        return doc_freq + np.where(found, self._delta_counts[positions], 0)
+
+    def _add_counts(self, buckets, sign):
+        buckets, counts = np.unique(buckets, return_counts=True)
+        keys = np.union1d(self._delta_buckets, buckets)
+        values = np.zeros(len(keys), dtype=np.int64)
+        values[np.searchsorted(keys, self._delta_buckets)] += self._delta_counts
+        values[np.searchsorted(keys, buckets)] += sign * counts
+        if len(keys) > self.delta_limit:
+            base = self._base_doc_freq.copy()
+            base[keys] += values
+            self._base_doc_freq = base
+            keys, values = keys[:0], values[:0]
+        self._delta_buckets, self._delta_counts = keys, values
+
+    def build_analyzer(self):
+        return self._hasher.build_analyzer()
+
+    def _presence(self, texts):
+        counts = self._hasher.transform(texts)
+        counts.sum_duplicates()
+        return counts
+
+    def _learn_names(self, texts):
+        analyzer = self.build_analyzer()
+        new_tokens = sorted({token for text in texts for token in analyzer(text)} - self._known_tokens)
+        if not new_tokens:
+            return
+        buckets = self._hasher.transform(new_tokens)
+        for row, token in enumerate(new_tokens):
+            self.bucket_names.setdefault(int(buckets.indices[buckets.indptr[row]]), token)
+        self._known_tokens.update(new_tokens)
+
+    def fit(self, texts):
+        texts = list(texts)
+        self._reset()
+        counts = self._presence(texts)
+        self._base_doc_freq = np.bincount(counts.indices, minlength=self.n_features).astype(np.int64)
+        self.n_docs = counts.shape[0]
+        self._learn_names(texts)
+        self._fit_doc_freq = self._base_doc_freq
+        self._fit_n_docs = self.n_docs
+        self._fit_buckets = np.flatnonzero(self._base_doc_freq)
+        return self
+
+    def partial_fit(self, texts):
+        """Counts `texts` as new documents."""
+        texts = list(texts)
+        counts = self._presence(texts)
+        self._add_counts(counts.indices, 1)
+        self.n_docs += counts.shape[0]
+        self._learn_names(texts)
+        return self
+
+    def forget(self, texts):
+        """Removes `texts`, previously counted by fit or partial_fit, from the counters."""
+        counts = self._presence(list(texts))
+        self._add_counts(counts.indices, -1)
+        self.n_docs -= counts.shape[0]
+        return self
+
+    def _idf(self, buckets, n_docs=None, doc_freq=None):
+        n_docs = self.n_docs if n_docs is None else n_docs
+        freq = self._doc_freq_at(buckets) if doc_freq is None else doc_freq[buckets]
+        return np.log((1 + n_docs) / (1 + freq)) + 1
+
+    def transform(self, texts):
+        counts = self._hasher.transform(texts)
+        counts.sum_duplicates()
+        counts.data = counts.data * self._idf(counts.indices)
+        return normalize(counts)
+
+    def idf_drift(self):
+        """
+        Largest relative IDF change, since the last fit, of any bucket seen at fit
+        time: rows transformed at fit time carry those buckets' old weights. Buckets
+        first seen afterwards have no fit-time weight to drift from.
+        """
+        buckets = self._fit_buckets
+        if len(buckets) == 0:
+            return 0.0
+        before = self._idf(buckets, self._fit_n_docs, self._fit_doc_freq)
+        return float(np.max(np.abs(self._idf(buckets) - before) / before))
+
+    @property
+    def net_added_docs(self):
+        return self.n_docs - self._fit_n_docs
@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+import time
+
+from storage import INTERNSHIPS
+
+
+class InternshipReloader:
+    """
+    Watches the files behind the engine's internship table and hot-reloads them.
+    A daemon thread stats the files (mtime and size) every `interval` seconds and
+    asks storage for the table's version only when the stat changes (a content hash,
+    or SQLite's per-table write counter, so student writes to the same file are
+    ignored). A version other than the one the engine last read or wrote rebuilds
+    the internship side with engine.reload_internships(), which readers pick up in
+    one snapshot swap; the engine's own writes (add_internship, ...) record their
+    version and so do not trigger a reload.
+    A failed reload (e.g. a half-written file) is retried on the next poll.
+    """
+
+    def __init__(self, engine, interval=5.0):
+        self.engine = engine
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._stat = self._stat_sources()
+        self.data_version = self._engine_version()
+        self.loaded_at = time.time()
+        self.last_checked = None
+        self.last_rebuild_seconds = None
+        self.last_error = None
+        self.reloads = 0
+        self.failures = 0
+
+    def _paths(self):
+        return self.engine.storage.source_paths(INTERNSHIPS)
+
+    def _stat_sources(self):
+        stats = []
+        for path in self._paths():
+            try:
+                st = os.stat(path)
+                stats.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append((path, None, None))
+        return tuple(stats)
+
+    def _hash(self):
+        return self.engine.storage.table_version(INTERNSHIPS)
+
+    def _engine_version(self):
+        return (self.engine.data_versions or {}).get(INTERNSHIPS)
+
+    def check(self):
+        """Polls once and reloads if the data changed; returns whether a reload ran."""
+        self.last_checked = time.time()
+        stat = self._stat_sources()
+        if stat == self._stat:
+            return False
+        try:
+            version = self._hash()
+            if version == self._engine_version():
+                self._stat = stat  # touched, restored, or written by the engine itself
+                self.data_version = version
+                self.last_error = None
+                return False
+            started = time.perf_counter()
+            self.engine.reload_internships()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logging.error(f"Internship reload failed, retrying on the next poll. Error: {e}")
+            return False
+        self.last_rebuild_seconds = round(time.perf_counter() - started, 4)
+        self._stat = stat
+        self.data_version = self._engine_version()
+        self.loaded_at = time.time()
+        self.last_error = None
+        self.reloads += 1
+        logging.info(f"Reloaded internships (version {version}) in {self.last_rebuild_seconds}s.")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="internship-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self):
+        return {
+            "data_version": self.data_version,
+            "snapshot_version": self.engine.snapshot.version,
+            "internships": len(self.engine.internships_df),
+            "loaded_at": self.loaded_at,
+            "last_checked": self.last_checked,
+            "last_rebuild_seconds": self.last_rebuild_seconds,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "interval_seconds": self.interval,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
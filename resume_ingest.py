@@ -0,0 +1,152 @@
+# resume_ingest.py
+
+import os
+import signal
+import zipfile
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from resume_parser import extract_skills_from_resume
+
+RESUME_EXTENSIONS = (".pdf", ".docx")
+MAX_ARCHIVE_FILES = 5000
+MAX_ARCHIVE_BYTES = 500 * 1024 * 1024
+ADD_BATCH_SIZE = 64
+
+
+class ResumeTimeoutError(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ResumeTimeoutError("Timed out while parsing resume")
+
+
+def _parse_resume_worker(file_path, timeout):
+    """Runs inside a pool process; the per-file timeout is enforced with SIGALRM where available."""
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_skills_from_resume(file_path)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def find_resume_files(directory):
+    """Lists every PDF/DOCX file under `directory`, in a stable order."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(RESUME_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def extract_resume_archive(archive, dest_dir, max_files=MAX_ARCHIVE_FILES, max_bytes=MAX_ARCHIVE_BYTES):
+    """
+    Unpacks the PDF/DOCX members of a zip archive (a path or file object) into
+    `dest_dir` and returns their paths. Member paths are flattened to their base
+    names (one numbered sub-directory each, so duplicates do not collide) and
+    nothing is written outside dest_dir. The member count and total uncompressed
+    size are capped before anything is extracted.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        members = [
+            info for info in zf.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(RESUME_EXTENSIONS)
+        ]
+        if len(members) > max_files:
+            raise ValueError(f"Archive has {len(members)} resumes; the limit is {max_files}.")
+        if sum(info.file_size for info in members) > max_bytes:
+            raise ValueError(f"Archive expands beyond the {max_bytes} byte limit.")
+
+        paths = []
+        for position, info in enumerate(members):
+            base_name = os.path.basename(info.filename.replace("\\", "/"))
+            target_dir = os.path.join(dest_dir, f"{position:05d}")
+            os.makedirs(target_dir, exist_ok=True)
+            target = os.path.join(target_dir, base_name)
+            with zf.open(info) as src, open(target, "wb") as dst:
+                data = src.read(info.file_size + 1)
+                if len(data) > info.file_size:
+                    raise ValueError(f"Archive member {base_name} is larger than declared.")
+                dst.write(data)
+            paths.append(target)
+        return paths
+
+
+def profile_from_resume(file_name, skills, profile_defaults=None):
+    """Builds a new student profile from a parsed resume; the name comes from the file name."""
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    profile = {"branch": "", "location_preference": "", "cgpa": None}
+    profile.update(profile_defaults or {})
+    profile["name"] = " ".join(stem.replace("_", " ").replace("-", " ").split()).title()
+    profile["skills"] = ", ".join(skills)
+    return profile
+
+
+def _pool_context():
+    # Workers must not be forked from the server process: its reloader, LLM and job
+    # threads may hold locks at fork time. The fork server preloads only the parser,
+    # not __main__, so it never builds an engine or starts threads of its own.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["resume_parser"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _add_students(engine, pending):
+    """Adds the buffered (result, profile) pairs in one engine write and fills in their student_ids."""
+    student_ids = engine.add_new_students([profile for _, profile in pending])
+    for position, (result, profile) in enumerate(pending):
+        result["name"] = profile["name"]
+        result["student_id"] = None if student_ids is None else int(student_ids[position])
+        if student_ids is None:
+            result.update(status="failed", error="Could not add student profile.")
+        logging.info(f"Ingested resume {result['file']}: {result['status']}")
+    return [result for result, _ in pending]
+
+
+def ingest_resumes(file_paths, engine=None, max_workers=None, timeout=30, profile_defaults=None,
+                   batch_size=ADD_BATCH_SIZE):
+    """
+    Parses resumes across a process pool and yields one result dict per file as
+    it finishes: file, status ("ok", "no_skills", "timeout" or "failed"), skills,
+    and error. When an engine is given, resumes with skills are added as new
+    students `batch_size` at a time (one engine write per batch), and their
+    results are yielded once the batch is added, carrying the student_id.
+    """
+    if not file_paths:
+        return
+    batch_size = max(1, int(batch_size))
+    pending = []
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context()) as pool:
+        futures = {pool.submit(_parse_resume_worker, path, timeout): path for path in file_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            result = {"file": os.path.basename(path), "status": "ok", "skills": [], "error": None}
+            try:
+                result["skills"] = future.result()
+            except ResumeTimeoutError as e:
+                result.update(status="timeout", error=str(e))
+            except Exception as e:
+                result.update(status="failed", error=str(e))
+
+            if result["status"] == "ok" and not result["skills"]:
+                result["status"] = "no_skills"
+            if result["status"] == "ok" and engine is not None:
+                pending.append((result, profile_from_resume(path, result["skills"], profile_defaults)))
+                if len(pending) >= batch_size:
+                    yield from _add_students(engine, pending)
+                    pending = []
+                continue
+
+            logging.info(f"Ingested resume {result['file']}: {result['status']}")
+            yield result
+    if pending:
+        yield from _add_students(engine, pending)
@@ -4,47 +4,386 @@ import spacy
 import json
 import PyPDF2
 from docx import Document
-import re
+from collections import deque
+import hashlib
+import io
+import os
+import shutil
+import time
+
+SKILLS_PATH = 'skills.json'
 
 # Load the spaCy model and skills from the JSON file
 nlp = spacy.load("en_core_web_sm")
-with open('skills.json', 'r') as f:
-    SKILL_LIST = json.load(f)
+with open(SKILLS_PATH, 'rb') as f:
+    _skills_bytes = f.read()
+SKILL_LIST = json.loads(_skills_bytes)
+# Identifies the skill list a cached result was produced with.
+SKILLS_VERSION = hashlib.sha256(_skills_bytes).hexdigest()[:16]
+_skills_mtime = os.stat(SKILLS_PATH).st_mtime_ns
+
+# Limits that protect the server from huge or malicious uploads.
+MAX_RESUME_BYTES = 10 * 1024 * 1024
+MAX_RESUME_PAGES = 20
+MAX_RESUME_TEXT_CHARS = 200_000
+
+
+def _is_word_char(ch):
+    """Mirrors the regex \\w class for str patterns."""
+    return ch.isalnum() or ch == "_"
+
+
+def _lower_preserving_length(text):
+    """Lower-cases text while keeping one output character per input character."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over the skill list. It finds every skill in a single
+    pass over the text, with the same case-insensitive whole-word (\\b...\\b)
+    semantics as searching for each skill separately with a regex.
+    """
+
+    def __init__(self, skills):
+        self.skills = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for skill in dict.fromkeys(skills):
+            pattern = _lower_preserving_length(skill)
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._output[state].append(len(self.skills))
+            self.skills.append((skill, len(pattern)))
+        self._max_length = max((length for _, length in self.skills), default=0)
+
+        # Breadth-first pass to set failure links; each state also inherits the
+        # outputs of its failure state so matches ending inside longer skills are kept.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+                queue.append(child)
+
+    def _is_boundary(self, text, pos):
+        before = pos > 0 and _is_word_char(text[pos - 1])
+        after = pos < len(text) and _is_word_char(text[pos])
+        return before != after
+
+    def iter_matches(self, text):
+        """Yields (start, end, skill) for every whole-word skill occurrence, in end order."""
+        return self.iter_chunk_matches([text])
+
+    def iter_chunk_matches(self, chunks):
+        """
+        Like iter_matches over the concatenation of `chunks`, consuming them lazily so
+        callers can stop pulling pages early. The automaton state and a short tail of
+        the previous chunk carry over, so skills spanning a chunk border are found.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        keep = self._max_length + 1
+        state, consumed, tail, pending = 0, 0, "", []
+        for chunk in chunks:
+            if not chunk:
+                continue
+            text = tail + chunk
+            base = consumed - len(tail)
+            # Matches that ended exactly at the previous chunk border could only
+            # have their trailing word boundary checked once this chunk arrived.
+            for start, end, skill in pending:
+                if self._is_boundary(text, end - base):
+                    yield start, end, skill
+            pending = []
+
+            for offset, ch in enumerate(_lower_preserving_length(chunk), start=len(tail)):
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+                for skill_id in output[state]:
+                    skill, length = self.skills[skill_id]
+                    start, end = offset + 1 - length, offset + 1
+                    if not self._is_boundary(text, start):
+                        continue
+                    if end == len(text):
+                        pending.append((base + start, base + end, skill))
+                    elif self._is_boundary(text, end):
+                        yield base + start, base + end, skill
+
+            consumed += len(chunk)
+            tail = text[-keep:]
+
+        for start, end, skill in pending:
+            if self._is_boundary(tail, len(tail)):
+                yield start, end, skill
+
+    def find(self, text):
+        """Maps each skill found in `text` to its match count and (start, end) positions."""
+        return self.find_in_chunks([text])
+
+    def find_in_chunks(self, chunks):
+        """find() over lazily produced text chunks, matched as each one arrives."""
+        found = {}
+        for start, end, skill in self.iter_chunk_matches(chunks):
+            entry = found.setdefault(skill, {"count": 0, "positions": []})
+            entry["count"] += 1
+            entry["positions"].append((start, end))
+        return found
+
+
+SKILL_MATCHER = SkillMatcher(SKILL_LIST)
+
+
+def _refresh_skills():
+    """Reloads the skill list and matcher when skills.json has changed on disk."""
+    global SKILL_LIST, SKILL_MATCHER, SKILLS_VERSION, _skills_mtime
+    try:
+        mtime = os.stat(SKILLS_PATH).st_mtime_ns
+    except OSError:
+        return
+    if mtime == _skills_mtime:
+        return
+    with open(SKILLS_PATH, 'rb') as f:
+        data = f.read()
+    _skills_mtime = mtime
+    version = hashlib.sha256(data).hexdigest()[:16]
+    if version != SKILLS_VERSION:
+        SKILL_LIST = json.loads(data)
+        SKILL_MATCHER = SkillMatcher(SKILL_LIST)
+        SKILLS_VERSION = version
+        if RESUME_CACHE is not None:
+            RESUME_CACHE.drop_other_versions(SKILLS_VERSION)
+
+
+class ResumeCache:
+    """
+    Persistent on-disk cache of parsed resumes. Entries are keyed by a hash of the
+    file bytes (plus the page cap) and live under a directory per skill-list
+    version, so editing skills.json invalidates them. Total size is capped with
+    least-recently-used eviction, using file mtimes as the access clock.
+    """
+
+    def __init__(self, directory=".resume_cache", max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+
+    def key(self, data, max_pages=None):
+        digest = hashlib.sha256(data)
+        digest.update(f"|pages={max_pages}|chars={MAX_RESUME_TEXT_CHARS}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key, version):
+        return os.path.join(self.directory, version, key + ".json")
+
+    def get(self, key, version):
+        path = self._path(key, version)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, version, entry):
+        path = self._path(key, version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = self._scan_size()
+        self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Other processes share the directory, so re-measure before deleting.
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def drop_other_versions(self, version):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name != version:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        self._size = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+# Set to None to disable caching of parsed resumes.
+RESUME_CACHE = ResumeCache()
+
+def _check_size(source, max_bytes):
+    max_bytes = MAX_RESUME_BYTES if max_bytes is None else max_bytes
+    size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+    if max_bytes and size > max_bytes:
+        raise ValueError(f"Resume is {size} bytes; the limit is {max_bytes} bytes.")
+
+def _as_stream(source):
+    """Wraps in-memory bytes in a file object; paths are passed through unchanged."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+def iter_pdf_pages(source, max_pages=None, max_bytes=None):
+    """
+    Lazily yields the text of each page of a PDF given as a path or in-memory bytes,
+    stopping after max_pages (default MAX_RESUME_PAGES).
+    """
+    _check_size(source, max_bytes)
+    max_pages = MAX_RESUME_PAGES if max_pages is None else max_pages
+    reader = PyPDF2.PdfReader(_as_stream(source))
+    for page_number, page in enumerate(reader.pages):
+        if max_pages and page_number >= max_pages:
+            break
+        yield page.extract_text() or ""
+
+def iter_docx_paragraphs(source, max_bytes=None):
+    """Lazily yields the paragraphs of a DOCX (path or bytes), newline-separated."""
+    _check_size(source, max_bytes)
+    doc = Document(_as_stream(source))
+    for position, para in enumerate(doc.paragraphs):
+        yield para.text if position == 0 else "\n" + para.text
+
+def _cap_chars(chunks, max_chars):
+    remaining = max_chars
+    for chunk in chunks:
+        if len(chunk) >= remaining:
+            yield chunk[:remaining]
+            return
+        remaining -= len(chunk)
+        yield chunk
 
 def extract_text_from_pdf(pdf_path):
-    """Extracts text from a PDF file."""
-    text = ""
-    with open(pdf_path, "rb") as file:
-        reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            text += page.extract_text()
-    return text
+    """Extracts text from a PDF file (path or bytes)."""
+    return "".join(iter_pdf_pages(pdf_path))
 
 def extract_text_from_docx(docx_path):
-    """Extracts text from a DOCX file."""
-    doc = Document(docx_path)
-    return "\n".join([para.text for para in doc.paragraphs])
+    """Extracts text from a DOCX file (path or bytes)."""
+    return "".join(iter_docx_paragraphs(docx_path))
+
+def _iter_resume_text(source, file_name, max_pages=None, max_bytes=None):
+    if file_name.lower().endswith(".pdf"):
+        chunks = iter_pdf_pages(source, max_pages, max_bytes)
+    elif file_name.lower().endswith(".docx"):
+        chunks = iter_docx_paragraphs(source, max_bytes)
+    else:
+        return None
+    return _cap_chars(chunks, MAX_RESUME_TEXT_CHARS)
+
+def _collect(chunks, into):
+    """Passes chunks through unchanged, keeping a copy of each in `into`."""
+    for chunk in chunks:
+        into.append(chunk)
+        yield chunk
 
-def extract_skills_from_resume(file_path):
+def _skills_from_chunks(chunks):
+    # Find every skill from our list in a single pass as pages are extracted; reading
+    # stops at the page and character caps applied by _iter_resume_text.
+    found = SKILL_MATCHER.find_in_chunks(chunks)
+    return sorted({skill.capitalize() for skill in found}) # Standardize the skill format
+
+def parse_resume(source, file_name, max_pages=None, max_bytes=None):
     """
-    Reads a resume file (PDF or DOCX), extracts text, and finds matching skills.
+    Returns {"text": ..., "skills": [...]} for a resume given as a path or bytes.
+    Results are served from RESUME_CACHE when the same file was parsed before with
+    the current skill list.
     """
-    # 1. Extract raw text from the file
-    if file_path.endswith(".pdf"):
-        text = extract_text_from_pdf(file_path)
-    elif file_path.endswith(".docx"):
-        text = extract_text_from_docx(file_path)
+    if not file_name.lower().endswith((".pdf", ".docx")):
+        return {"text": "", "skills": []}
+    _refresh_skills()
+    _check_size(source, max_bytes)
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
     else:
-        return []
+        with open(source, 'rb') as f:
+            data = f.read()
 
-    # 2. Pre-process text and use NLP to find skills
-    # We use a simple regex-based approach for high recall on our skill list
-    found_skills = set()
-    for skill in SKILL_LIST:
-        # Create a regex pattern to find the skill as a whole word, case-insensitive
-        pattern = r"\b" + re.escape(skill) + r"\b"
-        if re.search(pattern, text, re.IGNORECASE):
-            found_skills.add(skill.capitalize()) # Standardize the skill format
+    if RESUME_CACHE is not None:
+        key = RESUME_CACHE.key(data, max_pages)
+        cached = RESUME_CACHE.get(key, SKILLS_VERSION)
+        if cached is not None:
+            return cached
 
+    # Match while pages are extracted; the text is kept for the cache entry as it streams past.
+    pages = []
+    skills = _skills_from_chunks(_collect(_iter_resume_text(data, file_name, max_pages, max_bytes), pages))
+    entry = {"text": "".join(pages), "skills": skills, "parsed_at": time.time()}
+    if RESUME_CACHE is not None:
+        RESUME_CACHE.put(key, SKILLS_VERSION, entry)
+    return entry
 
-    return sorted(list(found_skills))
+def extract_skills_from_resume(file_path, max_pages=None, max_bytes=None):
+    """
+    Reads a resume file (PDF or DOCX), extracts text, and finds matching skills.
+    Raises ValueError if the file is larger than max_bytes (default MAX_RESUME_BYTES).
+    """
+    if RESUME_CACHE is not None:
+        return parse_resume(file_path, file_path, max_pages, max_bytes)["skills"]
+    _refresh_skills()
+    chunks = _iter_resume_text(file_path, file_path, max_pages, max_bytes)
+    if chunks is None:
+        return []
+    return _skills_from_chunks(chunks)
+
+def extract_skills_from_bytes(data, file_name, max_pages=None, max_bytes=None):
+    """
+    Same as extract_skills_from_resume for an in-memory upload; nothing is written
+    to disk. `file_name` only selects the format (.pdf or .docx).
+    """
+    if RESUME_CACHE is not None:
+        return parse_resume(data, file_name, max_pages, max_bytes)["skills"]
+    _refresh_skills()
+    chunks = _iter_resume_text(data, file_name, max_pages, max_bytes)
+    if chunks is None:
+        return []
+    return _skills_from_chunks(chunks)
@@ -0,0 +1,75 @@
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+# Public response schemas: the columns a client may see, in response order.
+# Internal columns such as profile_text and normalized_skills are never sent.
+INTERNSHIP_FIELDS = [
+    "internship_id",
+    "company",
+    "domain",
+    "required_skills",
+    "location",
+    "state",
+    "duration",
+    "stipend",
+    "match_score",
+]
+STUDENT_FIELDS = ["student_id", "name", "branch", "cgpa", "location_preference", "skills", "match_score"]
+
+# Floats are rounded to 15 decimal places, the most pandas' to_json allows. This is a
+# deliberate truncation: json.dumps writes the shortest repr that round-trips, so a
+# value may differ from it in the last digits (well below any score or stipend's
+# meaningful precision).
+DOUBLE_PRECISION = 15
+
+
+def parse_fields(raw, schema):
+    """
+    Requested projection from a comma-separated string or a list; None (all of
+    `schema`) when nothing was requested. Raises ValueError for unknown fields.
+    """
+    if raw is None or raw == "":
+        return None
+    names = raw.split(",") if isinstance(raw, str) else list(raw)
+    fields = [str(name).strip() for name in names if str(name).strip()]
+    unknown = [name for name in fields if name not in schema]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}. Available: {list(schema)}")
+    return fields or None
+
+
+def project(df, schema=None, fields=None):
+    """The columns of `df` in `fields` (or `schema`, or all when both are None), in that order."""
+    wanted = fields or schema
+    if wanted is None:
+        return df
+    return df[[col for col in wanted if col in df.columns]]
+
+
+def record_strings(df):
+    """
+    One JSON object string per row, serialized column-wise by pandas in a single
+    call (NumPy ints, floats and NaN are written natively, NaN as null).
+    """
+    if len(df) == 0:
+        return []
+    return df.to_json(orient="records", lines=True, double_precision=DOUBLE_PRECISION).splitlines()
+
+
+def records_json(df):
+    """The rows of `df` as a JSON array string."""
+    if len(df) == 0:
+        return "[]"
+    return df.to_json(orient="records", double_precision=DOUBLE_PRECISION)
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that also accepts NumPy scalars and arrays in jsonify()."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.generic):
+            return o.item()
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        return DefaultJSONProvider.default(o)
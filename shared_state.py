@@ -0,0 +1,389 @@
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from storage import INTERNSHIPS, STUDENTS
+
+# Each table's DataFrame attribute on the engine and the matrices with one row per table row.
+TABLES = {
+    STUDENTS: ("students_df", ["student_vectors", "student_skill_vectors"]),
+    INTERNSHIPS: ("internships_df", ["internship_vectors", "internship_skill_vectors"]),
+}
+
+
+def _strings(offsets, blob):
+    """A string column over UTF-8 bytes and their offsets: zero-copy with pyarrow, decoded otherwise."""
+    if pa is None:
+        return np.array([bytes(blob[start:end]).decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+    array = pa.LargeStringArray.from_buffers(len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(blob))
+    return pd.arrays.ArrowStringArray(array)
+
+
+class SharedEngineState:
+    """
+    Engine state published into memory-mapped files for every worker process on
+    the host. Rows live in a `store-NNNNNN` directory of append-only raw arrays:
+    the sparse matrices' CSR parts, numeric columns, mostly-distinct text columns
+    as UTF-8 bytes plus offsets, and other text columns as codes into a list of
+    distinct values. Each publish writes a small `gen-NNNNNN` directory (manifest,
+    vectorizers, vocabulary) recording how much of each array it covers, then bumps
+    the GENERATION file, so workers attach to complete generations only and can
+    tell from the counter when to re-attach. A publish that only added rows appends
+    them to the previous generation's store; anything else starts a new store.
+    Workers map a generation's prefix of the arrays read-only, so the page cache
+    holds one copy; text columns stay mapped too when pyarrow is installed.
+    """
+
+    def __init__(self, directory="shared_state", keep_generations=2, lock_timeout=600):
+        self.directory = directory
+        self.keep_generations = keep_generations
+        self.lock_timeout = lock_timeout
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def _generation_path(self):
+        return os.path.join(self.directory, "GENERATION")
+
+    def _name(self, generation):
+        return f"gen-{generation:06d}"
+
+    def generation(self):
+        """The latest published generation, or None if nothing has been published."""
+        try:
+            with open(self._generation_path(), 'r') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    @contextmanager
+    def lock(self):
+        """
+        Cross-process mutex (an exclusively created lock file), so only one worker
+        builds and publishes while the others wait and then attach. Re-entrant
+        within the owning thread.
+        """
+        with self._thread_lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            fd = self._acquire()
+            self._depth = 1
+            try:
+                yield
+            finally:
+                self._depth = 0
+                os.close(fd)
+                os.remove(self._lock_path())
+
+    def _lock_path(self):
+        return os.path.join(self.directory, "publish.lock")
+
+    def _acquire(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._lock_path()
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > self.lock_timeout:
+                        os.remove(path)  # left behind by a crashed publisher
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {path}")
+                time.sleep(0.1)
+        os.write(fd, str(os.getpid()).encode())
+        return fd
+
+    def _new_layout(self, engine, generation):
+        """
+        An empty store for the engine's tables: numeric columns as plain arrays, text
+        columns that are mostly distinct and never missing as UTF-8 bytes plus
+        offsets, other text columns as codes. Offset arrays start at a single 0.
+        """
+        frames, arrays, widths = {}, {}, {}
+        for table, (frame, matrix_names) in TABLES.items():
+            df = getattr(engine, frame)
+            frames[table] = []
+            for col in df.columns:
+                key = f"{table}.{col}"
+                values = df[col]
+                if isinstance(values.dtype, np.dtype) and values.dtype != object:
+                    frames[table].append({"name": col, "encoding": "plain"})
+                    arrays[key] = {"dtype": values.dtype.str, "length": 0}
+                elif pd.api.types.infer_dtype(values, skipna=False) == "string" and values.nunique() > len(values) // 2:
+                    frames[table].append({"name": col, "encoding": "utf8"})
+                    arrays[f"{key}.utf8"] = {"dtype": "|u1", "length": 0}
+                    arrays[f"{key}.offsets"] = {"dtype": "<i8", "length": 1, "offsets_of": f"{key}.utf8"}
+                else:
+                    frames[table].append({"name": col, "encoding": "dictionary"})
+                    arrays[f"{key}.codes"] = {"dtype": "<i4", "length": 0}
+            for name in matrix_names:
+                matrix = getattr(engine, name)
+                index_dtype = matrix.indices.dtype.str  # scipy copies indices and indptr of mixed types
+                arrays[f"{name}.data"] = {"dtype": matrix.data.dtype.str, "length": 0}
+                arrays[f"{name}.indices"] = {"dtype": index_dtype, "length": 0}
+                arrays[f"{name}.indptr"] = {"dtype": index_dtype, "length": 1, "offsets_of": f"{name}.data"}
+                widths[name] = matrix.shape[1]
+        return {
+            "store": f"store-{generation:06d}",
+            "frames": frames,
+            "arrays": arrays,
+            "widths": widths,
+            "rows": dict.fromkeys(TABLES, 0),
+            "values": {},
+        }
+
+    def _append_base(self, engine):
+        """
+        The layout of the latest generation if the engine holds it plus appended rows
+        only (engine.shared_rows), so the next generation can extend its store.
+        """
+        generation = self.generation()
+        if generation is None or generation != engine.shared_generation:
+            return None
+        manifest = self._manifest(generation)
+        if manifest is None or "store" not in manifest:
+            return None
+        shared_rows = engine.shared_rows or {}
+        if any(shared_rows.get(table) != manifest["rows"][table] for table in TABLES):
+            return None
+        return {key: manifest[key] for key in ("store", "frames", "arrays", "widths", "rows", "values")}
+
+    def _encode_rows(self, engine, layout):
+        """
+        The arrays to append for the rows the store does not hold yet, with offset
+        arrays already shifted onto the stored data. Extends the layout's dictionary
+        values in place. Raises ValueError if a new row does not fit the layout (a
+        missing value in a UTF-8 column, a wider dtype, a changed column).
+        """
+        encoded = {}
+        for table, (frame, matrix_names) in TABLES.items():
+            df = getattr(engine, frame)
+            if [column["name"] for column in layout["frames"][table]] != list(df.columns):
+                raise ValueError(f"{table} columns changed")
+            start = layout["rows"][table]
+            new_rows = df.iloc[start:]
+            for column in layout["frames"][table]:
+                key = f"{table}.{column['name']}"
+                values = new_rows[column["name"]]
+                if column["encoding"] == "utf8":
+                    if pd.api.types.infer_dtype(values, skipna=False) not in ("string", "empty"):
+                        raise ValueError(f"{key} has values that are not strings")
+                    blobs = [value.encode("utf-8") for value in values]
+                    lengths = np.fromiter(map(len, blobs), dtype=np.int64, count=len(blobs))
+                    encoded[f"{key}.utf8"] = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+                    encoded[f"{key}.offsets"] = np.concatenate([[0], np.cumsum(lengths)])
+                elif column["encoding"] == "dictionary":
+                    codes, uniques = pd.factorize(values)
+                    known = layout["values"].setdefault(key, [])
+                    index = {value: code for code, value in enumerate(known)}
+                    for value in map(str, uniques):
+                        if value not in index:
+                            index[value] = len(known)
+                            known.append(value)
+                    mapping = np.array([index[str(value)] for value in uniques] + [-1], dtype=np.int32)
+                    encoded[f"{key}.codes"] = mapping[codes]  # code -1 (missing) picks the trailing -1
+                else:
+                    encoded[key] = values.to_numpy()
+            for name in matrix_names:
+                matrix = getattr(engine, name).tocsr()
+                if matrix.shape[1] != layout["widths"][name]:
+                    raise ValueError(f"{name} changed width")
+                rows = matrix[start:]
+                encoded[f"{name}.data"] = rows.data
+                encoded[f"{name}.indices"] = rows.indices
+                encoded[f"{name}.indptr"] = rows.indptr
+
+        arrays = layout["arrays"]
+        for key, array in encoded.items():
+            spec = arrays[key]
+            if "offsets_of" in spec:
+                # The leading 0 is already stored; the rest continues after the stored data.
+                array = array[1:].astype(np.int64) + arrays[spec["offsets_of"]]["length"]
+                if len(array) and array[-1] > np.iinfo(spec["dtype"]).max:
+                    raise ValueError(f"{key} overflows {spec['dtype']}")
+            elif not np.can_cast(array.dtype, spec["dtype"]):
+                raise ValueError(f"{key} is {array.dtype}, stored as {spec['dtype']}")
+            encoded[key] = np.ascontiguousarray(array, dtype=spec["dtype"])
+        return encoded
+
+    def _append(self, layout, encoded):
+        """Appends encoded rows to the store's files; returns the array lengths after it."""
+        store = os.path.join(self.directory, layout["store"])
+        os.makedirs(store, exist_ok=True)
+        arrays = {}
+        for key, spec in layout["arrays"].items():
+            array = encoded[key]
+            with open(os.path.join(store, f"{key}.bin"), 'ab') as f:
+                # Drops whatever a failed publish left past the end of the latest generation.
+                f.truncate(spec["length"] * array.itemsize)
+                f.write(array.data)
+            arrays[key] = {**spec, "length": spec["length"] + len(array)}
+        return arrays
+
+    def publish(self, engine):
+        """Writes the engine's data and fitted state as the next generation; returns its number."""
+        with self.lock():
+            return self._publish(engine)
+
+    def _publish(self, engine):
+        generation = (self.generation() or 0) + 1
+        layout = self._append_base(engine)
+        encoded = None
+        if layout is not None:
+            try:
+                encoded = self._encode_rows(engine, layout)
+            except ValueError:
+                encoded = None
+        if encoded is None:
+            layout = self._new_layout(engine, generation)
+            # Left behind only by a publish of this same generation that failed.
+            shutil.rmtree(os.path.join(self.directory, layout["store"]), ignore_errors=True)
+            encoded = self._encode_rows(engine, layout)
+        layout["arrays"] = self._append(layout, encoded)
+        layout["rows"] = {table: len(getattr(engine, frame)) for table, (frame, _) in TABLES.items()}
+
+        name = self._name(generation)
+        tmp_dir = os.path.join(self.directory, f".{name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        with open(os.path.join(tmp_dir, "vectorizers.pkl"), 'wb') as f:
+            pickle.dump(
+                {"profile": engine.vectorizer, "skills": engine.skill_vectorizer}, f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        with open(os.path.join(tmp_dir, "skills_vocabulary.json"), 'w') as f:
+            json.dump(sorted(engine.skills_vocabulary), f)
+        manifest = {
+            "generation": generation,
+            "published_at": time.time(),
+            "data_versions": engine.data_versions,
+            "stored_columns": {
+                "students": engine.stored_student_columns,
+                "internships": engine.stored_internship_columns,
+            },
+            **layout,
+        }
+        with open(os.path.join(tmp_dir, "shared.json"), 'w') as f:
+            json.dump(manifest, f)
+        target = os.path.join(self.directory, name)
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(tmp_dir, target)
+
+        tmp_path = f"{self._generation_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(f"{generation}\n")
+        os.replace(tmp_path, self._generation_path())
+        self._drop_old(generation)
+        return generation
+
+    def _manifest(self, generation):
+        try:
+            with open(os.path.join(self.directory, self._name(generation), "shared.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def data_versions(self, generation=None):
+        """
+        The storage table versions a generation (default: the latest) holds the data
+        of, or None if nothing is published or it predates versions or stores.
+        """
+        generation = self.generation() if generation is None else generation
+        if generation is None:
+            return None
+        manifest = self._manifest(generation)
+        if manifest is None or "store" not in manifest:
+            return None
+        return manifest.get("data_versions")
+
+    def _drop_old(self, generation):
+        # Workers still mapped to an older generation keep their open files on POSIX.
+        for old in range(max(1, generation - 50), generation - self.keep_generations + 1):
+            shutil.rmtree(os.path.join(self.directory, self._name(old)), ignore_errors=True)
+        # A store serves every generation appended to it; it goes once none of them is kept.
+        kept = set()
+        for old in range(max(1, generation - self.keep_generations + 1), generation + 1):
+            manifest = self._manifest(old)
+            if manifest is not None:
+                kept.add(manifest.get("store"))
+        for entry in os.listdir(self.directory):
+            if entry.startswith("store-") and entry not in kept:
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+    def _map(self, store, key, spec):
+        if spec["length"] == 0:
+            return np.empty(0, dtype=spec["dtype"])  # an empty file cannot be mapped
+        return np.memmap(os.path.join(store, f"{key}.bin"), dtype=spec["dtype"], mode="r", shape=(spec["length"],))
+
+    def _load_frame(self, table, columns, arrays, values):
+        data = {}
+        for column in columns:
+            col = column["name"]
+            key = f"{table}.{col}"
+            if column["encoding"] == "utf8":
+                data[col] = _strings(arrays[f"{key}.offsets"], arrays[f"{key}.utf8"])
+            elif column["encoding"] == "dictionary":
+                uniques = np.array(values.get(key, []) + [np.nan], dtype=object)
+                data[col] = uniques[arrays[f"{key}.codes"]]  # code -1 (missing) picks the trailing NaN
+            else:
+                data[col] = arrays[key]
+        return pd.DataFrame(data, copy=False)
+
+    def attach(self, generation=None):
+        """
+        Maps a published generation (default: the latest) read-only. Returns a dict
+        with the vectorizers, matrices, skills vocabulary, both DataFrames and the
+        stored column lists, or None if nothing is published.
+        """
+        generation = self.generation() if generation is None else generation
+        if generation is None:
+            return None
+        directory = os.path.join(self.directory, self._name(generation))
+        with open(os.path.join(directory, "shared.json"), 'r') as f:
+            manifest = json.load(f)
+        with open(os.path.join(directory, "vectorizers.pkl"), 'rb') as f:
+            vectorizers = pickle.load(f)
+        with open(os.path.join(directory, "skills_vocabulary.json"), 'r') as f:
+            skills_vocabulary = set(json.load(f))
+        store = os.path.join(self.directory, manifest["store"])
+        arrays = {key: self._map(store, key, spec) for key, spec in manifest["arrays"].items()}
+        matrices, frames = {}, {}
+        for table, (frame, matrix_names) in TABLES.items():
+            for name in matrix_names:
+                parts = tuple(arrays[f"{name}.{part}"] for part in ("data", "indices", "indptr"))
+                shape = (manifest["rows"][table], manifest["widths"][name])
+                matrices[name] = sp.csr_matrix(parts, shape=shape, copy=False)
+            frames[frame] = self._load_frame(table, manifest["frames"][table], arrays, manifest["values"])
+        return {
+            "generation": generation,
+            "vectorizer": vectorizers["profile"],
+            "skill_vectorizer": vectorizers["skills"],
+            "matrices": matrices,
+            "skills_vocabulary": skills_vocabulary,
+            "students_df": frames["students_df"],
+            "internships_df": frames["internships_df"],
+            "stored_columns": manifest["stored_columns"],
+            "data_versions": manifest.get("data_versions"),
+        }
@@ -0,0 +1,159 @@
+import functools
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+
+class EngineSnapshot:
+    """
+    One immutable, internally consistent version of the engine's state: the two
+    tables, the vectorizers and matrices, every index built over them, and the
+    bookkeeping that describes them (stored columns, load and dense reports, refit
+    count, shared generation and how many rows it holds unchanged, the storage
+    versions the tables were read at), so a failed write rolls all of it back. A
+    new version is always a new object, so a reader holding a snapshot never sees
+    a half-applied write.
+    """
+
+    FIELDS = (
+        "students_df",
+        "internships_df",
+        "vectorizer",
+        "skill_vectorizer",
+        "student_vectors",
+        "internship_vectors",
+        "student_skill_vectors",
+        "internship_skill_vectors",
+        "skills_vocabulary",
+        "skill_feature_names",
+        "filter_index",
+        "student_lookup",
+        "internship_lookup",
+        "ann_index",
+        "dense",
+        "dense_student_vectors",
+        "dense_internship_vectors",
+        "drift",
+        "stored_student_columns",
+        "stored_internship_columns",
+        "load_report",
+        "dense_report",
+        "refit_count",
+        "shared_generation",
+        "shared_rows",
+        "data_versions",
+    )
+
+    def __init__(self, version=0, **fields):
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown snapshot fields: {sorted(unknown)}")
+        for name in self.FIELDS:
+            object.__setattr__(self, name, fields.get(name))
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EngineSnapshot is immutable; build the next one through SnapshotCell.writing()")
+
+    def draft(self):
+        """A mutable copy of the fields for a writer to edit."""
+        return SimpleNamespace(**{name: getattr(self, name) for name in self.FIELDS})
+
+
+class SnapshotCell:
+    """
+    Holds the current EngineSnapshot. Readers take no lock: they read the
+    reference, which is swapped atomically, and pinned() keeps one snapshot for a
+    whole call or request on this thread. Writers are serialized by a lock and
+    edit a draft that is published as the next snapshot only when the write
+    finishes without an exception; until then, readers keep the previous one.
+    """
+
+    def __init__(self):
+        self._current = EngineSnapshot()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    @property
+    def current(self):
+        """The snapshot (or, inside writing(), the draft) this thread reads."""
+        pinned = getattr(self._local, "snapshot", None)
+        return self._current if pinned is None else pinned
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @contextmanager
+    def pinned(self):
+        """Reads on this thread see one snapshot until the block exits."""
+        if getattr(self._local, "snapshot", None) is not None:
+            yield self._local.snapshot
+            return
+        self._local.snapshot = self._current
+        try:
+            yield self._local.snapshot
+        finally:
+            self._local.snapshot = None
+
+    @contextmanager
+    def writing(self):
+        """
+        Runs a write against a draft of the latest snapshot and swaps the result
+        in on success. Nested writes on the same thread join the outer one.
+        """
+        outer = getattr(self._local, "snapshot", None)
+        if isinstance(outer, SimpleNamespace):
+            yield outer
+            return
+        with self._write_lock:
+            draft = self._current.draft()
+            self._local.snapshot = draft
+            try:
+                yield draft
+            except BaseException:
+                self._local.snapshot = outer
+                raise
+            self._current = EngineSnapshot(self._current.version + 1, **vars(draft))
+            # A pinned reader that writes sees its own write afterwards.
+            self._local.snapshot = None if outer is None else self._current
+
+    def set(self, name, value):
+        draft = getattr(self._local, "snapshot", None)
+        if not isinstance(draft, SimpleNamespace):
+            raise AttributeError(f"'{name}' can only be changed inside SnapshotCell.writing()")
+        setattr(draft, name, value)
+
+
+def snapshot_field(name):
+    """Engine attribute that reads from, and inside a write sets, the current snapshot."""
+
+    def get(self):
+        return getattr(self._state.current, name)
+
+    def set(self, value):
+        self._state.set(name, value)
+
+    return property(get, set)
+
+
+def reads_snapshot(method):
+    """Runs an engine method against a single pinned snapshot."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state.pinned():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def writes_snapshot(method):
+    """Runs an engine method as one atomic write (see SnapshotCell.writing)."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state.writing():
+            return method(self, *args, **kwargs)
+
+    return wrapper
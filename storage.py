@@ -0,0 +1,360 @@
+import argparse
+import csv
+import glob
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from artifacts import fingerprint_files
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+STUDENTS = "students"
+INTERNSHIPS = "internships"
+ID_COLUMNS = {STUDENTS: "student_id", INTERNSHIPS: "internship_id"}
+# The columns each table ships with; a table with no stored rows yet loads with these.
+TABLE_COLUMNS = {
+    STUDENTS: ["student_id", "name", "branch", "cgpa", "location_preference", "skills"],
+    INTERNSHIPS: ["internship_id", "company", "domain", "location", "state", "stipend", "duration", "required_skills"],
+}
+
+
+class Storage(ABC):
+    """
+    Where the student and internship tables live. Backends load whole tables
+    (optionally only some columns), look up single rows by ID, and append new
+    students without rewriting what is already stored. CSV import and export are
+    shared by every backend.
+    """
+
+    @abstractmethod
+    def load(self, table, columns=None):
+        """The whole table, or only `columns` of it, as a DataFrame."""
+
+    @abstractmethod
+    def get(self, table, entity_id):
+        """The row with this ID as a dict, or None."""
+
+    @abstractmethod
+    def append(self, table, df):
+        """Adds the rows of `df` after the stored ones."""
+
+    @abstractmethod
+    def replace(self, table, df):
+        """Stores `df` as the whole table."""
+
+    @abstractmethod
+    def delete(self, table, entity_id):
+        """Removes the row with this ID; returns whether one was found."""
+
+    @abstractmethod
+    def fingerprint(self):
+        """Changes whenever the stored data changes; keys the engine's saved artifacts."""
+
+    @abstractmethod
+    def source_paths(self, table):
+        """The files a table is stored in, for watching them for outside changes."""
+
+    def table_version(self, table):
+        """Changes whenever `table` changes, and only then; polled by the reloader."""
+        return fingerprint_files(*self.source_paths(table))
+
+    def load_students(self, columns=None):
+        return self.load(STUDENTS, columns)
+
+    def load_internships(self, columns=None):
+        return self.load(INTERNSHIPS, columns)
+
+    def get_student(self, student_id):
+        return self.get(STUDENTS, student_id)
+
+    def get_internship(self, internship_id):
+        return self.get(INTERNSHIPS, internship_id)
+
+    def append_students(self, df):
+        self.append(STUDENTS, df)
+
+    def append_internships(self, df):
+        self.append(INTERNSHIPS, df)
+
+    def delete_student(self, student_id):
+        return self.delete(STUDENTS, student_id)
+
+    def delete_internship(self, internship_id):
+        return self.delete(INTERNSHIPS, internship_id)
+
+    def import_csv(self, student_csv, internship_csv):
+        self.replace(STUDENTS, pd.read_csv(student_csv))
+        self.replace(INTERNSHIPS, pd.read_csv(internship_csv))
+
+    def export_csv(self, student_csv, internship_csv):
+        self.load_students().to_csv(student_csv, index=False)
+        self.load_internships().to_csv(internship_csv, index=False)
+
+
+def _first_or_none(df):
+    if df.empty:
+        return None
+    return df.iloc[0].to_dict()
+
+
+class CSVStorage(Storage):
+    """
+    The original two CSV files. Appends add lines to the end of the file (in the
+    file's own column order); point lookups have no index and scan the file, and
+    deletes rewrite it.
+    """
+
+    def __init__(self, student_filepath="students.csv", internship_filepath="internships.csv"):
+        self.paths = {STUDENTS: student_filepath, INTERNSHIPS: internship_filepath}
+
+    def load(self, table, columns=None):
+        return pd.read_csv(self.paths[table], usecols=columns)
+
+    def get(self, table, entity_id):
+        id_column = ID_COLUMNS[table]
+        for chunk in pd.read_csv(self.paths[table], chunksize=10000):
+            match = chunk[chunk[id_column] == entity_id]
+            if not match.empty:
+                return _first_or_none(match)
+        return None
+
+    def _header(self, table):
+        with open(self.paths[table], 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader(f))
+
+    def append(self, table, df):
+        path = self.paths[table]
+        needs_newline = False
+        with open(path, 'rb') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            if needs_newline:
+                f.write("\n")
+            df.reindex(columns=self._header(table)).to_csv(f, header=False, index=False)
+
+    def replace(self, table, df):
+        df.to_csv(self.paths[table], index=False)
+
+    def delete(self, table, entity_id):
+        df = pd.read_csv(self.paths[table])
+        keep = df[ID_COLUMNS[table]] != entity_id
+        if keep.all():
+            return False
+        self.replace(table, df[keep])
+        return True
+
+    def fingerprint(self):
+        return fingerprint_files(self.paths[STUDENTS], self.paths[INTERNSHIPS])
+
+    def source_paths(self, table):
+        return [self.paths[table]]
+
+
+class SQLiteStorage(Storage):
+    """
+    Both tables in one SQLite file with a unique index on each ID column, so point
+    lookups are indexed and appends are plain INSERTs. Populate it once with
+    import_csv(). Triggers count the writes to each table in `table_versions`,
+    so a change to one table is not mistaken for a change to the other. The one
+    connection is shared by all threads, one statement sequence at a time.
+    """
+
+    def __init__(self, path="internships.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._tracked = set()
+
+    def _track_changes(self, table):
+        # Idempotent; replace() drops the table's triggers along with the table. Needs _lock.
+        self._conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO table_versions VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            self._conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version AFTER {event} ON {table} "
+                f"BEGIN UPDATE table_versions SET version = version + 1 WHERE name = '{table}'; END"
+            )
+        self._conn.commit()
+        self._tracked.add(table)
+
+    def _columns(self, table):
+        return [row[1] for row in self._conn.execute(f'PRAGMA table_info("{table}")')]
+
+    def _select(self, table, columns):
+        if columns is None:
+            return "*"
+        known = set(self._columns(table))
+        unknown = [col for col in columns if col not in known]
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {unknown}")
+        return ", ".join(f'"{col}"' for col in columns)
+
+    def load(self, table, columns=None):
+        with self._lock:
+            query = f"SELECT {self._select(table, columns)} FROM {table} ORDER BY rowid"
+            return pd.read_sql_query(query, self._conn)
+
+    def get(self, table, entity_id):
+        query = f"SELECT * FROM {table} WHERE {ID_COLUMNS[table]} = ?"
+        with self._lock:
+            return _first_or_none(pd.read_sql_query(query, self._conn, params=(int(entity_id),)))
+
+    def append(self, table, df):
+        with self._lock:
+            df.reindex(columns=self._columns(table)).to_sql(table, self._conn, if_exists="append", index=False)
+            self._conn.commit()
+
+    def replace(self, table, df):
+        id_column = ID_COLUMNS[table]
+        with self._lock:
+            df.to_sql(table, self._conn, if_exists="replace", index=False)
+            self._conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_{id_column} ON {table} ({id_column})")
+            self._track_changes(table)
+            self._conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = ?", (table,))
+            self._conn.commit()
+
+    def delete(self, table, entity_id):
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {table} WHERE {ID_COLUMNS[table]} = ?", (int(entity_id),))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def fingerprint(self):
+        return fingerprint_files(self.path)
+
+    def source_paths(self, table):
+        # Both tables share the file; table_version() tells them apart.
+        return [self.path]
+
+    def table_version(self, table):
+        with self._lock:
+            if table not in self._tracked:
+                self._track_changes(table)
+            row = self._conn.execute("SELECT version FROM table_versions WHERE name = ?", (table,)).fetchone()
+        return f"{table}-v{row[0]}"
+
+
+class ParquetStorage(Storage):
+    """
+    One directory of Parquet part files per table. Loads read only the requested
+    columns, point lookups push the ID filter down to row-group statistics, and
+    each append writes a new part file. Once a table has more than `max_parts`
+    files, the next append folds them into one. Needs pyarrow.
+    """
+
+    def __init__(self, directory="data", max_parts=32):
+        if pq is None:
+            raise ImportError("ParquetStorage needs pyarrow; install it with `pip install pyarrow`.")
+        self.directory = directory
+        self.max_parts = max_parts
+
+    def _parts(self, table):
+        return sorted(glob.glob(os.path.join(self.directory, table, "part-*.parquet")))
+
+    def load(self, table, columns=None):
+        parts = self._parts(table)
+        if not parts:
+            return pd.DataFrame(columns=columns or TABLE_COLUMNS[table])
+        return pq.ParquetDataset(parts).read(columns=columns).to_pandas()
+
+    def get(self, table, entity_id):
+        parts = self._parts(table)
+        if not parts:
+            return None
+        dataset = pq.ParquetDataset(parts, filters=[(ID_COLUMNS[table], "==", entity_id)])
+        return _first_or_none(dataset.read().to_pandas())
+
+    def _next_part_path(self, table):
+        # Numbered after the last part, so names stay unique once compaction removes parts.
+        table_dir = os.path.join(self.directory, table)
+        os.makedirs(table_dir, exist_ok=True)
+        parts = self._parts(table)
+        number = int(os.path.basename(parts[-1])[len("part-"):-len(".parquet")]) + 1 if parts else 0
+        return os.path.join(table_dir, f"part-{number:05d}.parquet")
+
+    def _write_part(self, table, df, schema=None):
+        if schema is not None:
+            df = df.reindex(columns=schema.names)
+        pq.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False), self._next_part_path(table))
+
+    def _compact(self, table):
+        # The merged part is written before the old ones are removed.
+        parts = self._parts(table)
+        pq.write_table(pq.ParquetDataset(parts).read(), self._next_part_path(table))
+        for path in parts:
+            os.remove(path)
+
+    def append(self, table, df):
+        # Cast to the first part's schema so every part file reads back as one table.
+        parts = self._parts(table)
+        if not parts:
+            self._write_part(table, df)
+            return
+        self._write_part(table, df, pq.read_schema(parts[0]).remove_metadata())
+        if len(parts) + 1 > self.max_parts:
+            self._compact(table)
+
+    def replace(self, table, df):
+        for path in self._parts(table):
+            os.remove(path)
+        self._write_part(table, df)
+
+    def delete(self, table, entity_id):
+        # Only the part files that hold the ID are rewritten.
+        id_column = ID_COLUMNS[table]
+        found = False
+        for path in self._parts(table):
+            part = pq.read_table(path)
+            ids = part.column(id_column).to_numpy()
+            if (ids == entity_id).any():
+                pq.write_table(part.filter(pa.array(ids != entity_id)), path)
+                found = True
+        return found
+
+    def fingerprint(self):
+        return fingerprint_files(*(self._parts(STUDENTS) + self._parts(INTERNSHIPS)))
+
+    def source_paths(self, table):
+        return self._parts(table)
+
+
+def open_storage(uri=None, student_filepath="students.csv", internship_filepath="internships.csv"):
+    """
+    Storage from a URI: "sqlite:///path.db", "parquet:///directory", or None / "csv"
+    for the CSV files.
+    """
+    if not uri or uri == "csv":
+        return CSVStorage(student_filepath, internship_filepath)
+    scheme, _, location = uri.partition(":///")
+    if scheme == "sqlite":
+        return SQLiteStorage(location)
+    if scheme == "parquet":
+        return ParquetStorage(location)
+    raise ValueError(f"Unknown storage URI: {uri}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy the student and internship tables between CSV and a storage backend.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("uri", help='e.g. "sqlite:///internships.db" or "parquet:///data"')
+    parser.add_argument("--students", default="students.csv")
+    parser.add_argument("--internships", default="internships.csv")
+    args = parser.parse_args()
+
+    storage = open_storage(args.uri)
+    if args.command == "import":
+        storage.import_csv(args.students, args.internships)
+    else:
+        storage.export_csv(args.students, args.internships)
+    print(f"{args.command}ed {args.students} and {args.internships} ({args.uri}).")